@@ -1,3 +1,5 @@
+import threading
+
 from core.config import BASE_URL, IDENTITY, PASSWORD
 from storage.pocketbase import PocketBaseClient, PBError
 from controller.app_controller import AppController
@@ -7,15 +9,21 @@ from gui.main_window import MainWindow
 def main():
     client = PocketBaseClient(BASE_URL)
     try:
-        client.login(IDENTITY, PASSWORD)
+        # reusa el token persistido si sigue vigente; si no, login normal
+        client.login_cached(IDENTITY, PASSWORD)
     except PBError as e:
         # Evitamos tkinter si no tenemos token
         print(f"Login error: {e}")
         return
 
     controller = AppController(client)
+    # precalienta el cache de contextos mientras Tk arma la ventana
+    threading.Thread(target=controller.load_contexts, daemon=True).start()
     ui = MainWindow(controller)
-    ui.mainloop()
+    try:
+        ui.mainloop()
+    finally:
+        client.close()
 
 
 if __name__ == "__main__":
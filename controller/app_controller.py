@@ -1,3 +1,4 @@
+import threading
 from typing import List, Dict, Any
 from storage.pocketbase import PocketBaseClient
 from services.events_service import DailyOps
@@ -9,6 +10,9 @@ class AppController:
         self.client = client
         self.main_window=None
         self.menu=None
+        # los contextos cambian rarísimo: cache por sesión, precalentado en app.main
+        self._contexts_cache = None
+        self._contexts_lock = threading.Lock()
         
     # ---- UI integration ----
     def set_main_window(self,window):
@@ -32,12 +36,26 @@ class AppController:
             
     # ---- contexts ----
     def load_contexts(self) -> List[Dict[str, Any]]:
-        ctx = self.client.list_contexts()
-        if not ctx:
-            self.client.ensure_context("Laboral", "#2E86DE")
-            self.client.ensure_context("Personal", "#27AE60")
+        with self._contexts_lock:
+            if self._contexts_cache is not None:
+                return self._contexts_cache
             ctx = self.client.list_contexts()
-        return ctx
+            if not ctx:
+                # un solo batch crea ambos defaults y ya devuelve las filas
+                # creadas: nos ahorramos dos round-trips del arranque
+                owner = self.client.user_id
+                ctx = self.client.batch([
+                    {"method": "POST", "url": "/api/collections/contexts/records",
+                     "body": {"name": "Laboral", "color": "#2E86DE", "owner": owner}},
+                    {"method": "POST", "url": "/api/collections/contexts/records",
+                     "body": {"name": "Personal", "color": "#27AE60", "owner": owner}},
+                ])
+            self._contexts_cache = ctx
+            return ctx
+
+    def invalidate_contexts(self):
+        with self._contexts_lock:
+            self._contexts_cache = None
 
     # ---- tasks ----
     def list_open_tasks(self, context_id: str) -> List[Dict[str, Any]]:
@@ -45,20 +63,54 @@ class AppController:
     
     def list_all_tasks(self, context_id: str) -> List[Dict[str, Any]]:
         return self.client.list_tasks(context_id, status="all")
+
+    def list_all_tasks_multi(self, context_ids: List[str]) -> List[Dict[str, Any]]:
+        """Tareas de todos los tabs en un solo request (para el sync global)."""
+        return self.client.list_tasks_multi(context_ids, status="all")
     
     def add_task(self, context_id: str, title: str) -> Dict[str, Any]:
-        # posición naive: al final
-        items = self.client.list_tasks(context_id, status="open")
-        pos = max([(i.get("position") or 1.0) for i in items], default=0.0) + 1.0
+        # posición al final: el server nos da el máximo en una respuesta mínima,
+        # sin traer la lista entera solo para calcular un número
+        pos = self.client.top_position(context_id) + 1.0
         return self.client.create_task(title=title, context_id=context_id, position=pos, kind="todo")
 
+    def add_tasks_bulk(self, context_id: str, titles: List[str]) -> List[Dict[str, Any]]:
+        """Crea varias tareas en un solo round-trip usando el endpoint /api/batch."""
+        import datetime as dt
+        base = self.client.top_position(context_id)
+        journal_date = dt.date.today().isoformat()
+        ops = [{
+            "method": "POST",
+            "url": "/api/collections/tasks/records",
+            "body": {
+                "title": title,
+                "status": "open",
+                "kind": "todo",
+                "priority": 0,
+                "position": base + i + 1.0,
+                "context": context_id,
+                "owner": self.client.user_id,
+                "journal_date": journal_date,
+            },
+        } for i, title in enumerate(titles)]
+        return self.client.batch(ops)
+
     def toggle_done(self, task: Dict[str, Any]) -> Dict[str, Any]:
         new_status = "open" if task.get("status") == "done" else "done"
         return self.client.patch_task(task["id"], status=new_status)
 
+    # ---- realtime ----
+    def subscribe_realtime(self, on_event, on_status=None):
+        """Suscripción SSE a cambios en tasks (los callbacks llegan en otro hilo)."""
+        return self.client.subscribe(["tasks"], on_event, on_status)
+
+    def close_realtime(self):
+        self.client.close_realtime()
+
     # ---- daily ops ----
     def prepare_day(self):
-        svc = DailyOps(self.client.base_url, self.client.token, self.client.user_id)
+        svc = DailyOps(self.client.base_url, self.client.token, self.client.user_id,
+                       session=self.client.session)
         svc.prepare_today()
 
     def open_task_menu(self, task_id: str):
@@ -85,37 +137,15 @@ class AppController:
         """Editar/patch de una tarea."""
         return self.client.patch_task(task_id, **fields)
 
-    def create_subtask_a(self, parent_task_id: str, title: str) -> Dict[str, Any]:
-        """Crea una subtarea colgando de parent_task."""
-        # Listar hermanas para calcular position
-        try:
-            siblings = self.client.list_tasks(
-                context_id=None, status="open", parent_task=parent_task_id
-            )
-        except TypeError:
-            # Alternativa si tu cliente usa otro nombre/forma de filtro:
-            siblings = self.client.list_subtasks(parent_task_id)  # si existe
-
-        pos = max([(s.get("position") or 1.0) for s in siblings], default=0.0) + 1.0
-        return self.client.create_task(
-            title=title,
-            context_id=None,          # si tus subtareas no heredan contexto; ajusta si corresponde
-            parent_task=parent_task_id,   # <-- tu schema
-            position=pos,
-            kind="subtask",
-            status="open",
-        )
-
-    def create_subtask_b(self, parent_task_id: str, title: str) -> Dict[str, Any]:
-        """Crear una subtarea ligada a una tarea padre."""
-        # posición naive al final dentro del grupo del padre
-        siblings = self.client.list_subtasks(parent_task_id)  # si no lo tienes, usa un filtro list_tasks(...)
-        pos = max([(s.get("position") or 1.0) for s in siblings], default=0.0) + 1.0
+    def create_subtask(self, parent_task_id: str, title: str,
+                       context_id: str = None) -> Dict[str, Any]:
+        """Crea una subtarea colgando de parent_task (única variante canónica)."""
+        # posición al final dentro del grupo del padre, resuelta por el server
+        pos = self.client.top_position(parent_task=parent_task_id) + 1.0
         return self.client.create_task(
             title=title,
-            context_id=None,            # si tus subtareas no tienen contexto propio
-            parent_id=parent_task_id,   # <-- campo que tu schema soporte (p.ej. parent_id)
+            context_id=context_id,        # las subtareas pueden heredar contexto
+            parent_task=parent_task_id,   # campo real del schema (pb_bootstrap)
             position=pos,
-            kind="subtask",
-            status="open",
+            kind="todo",                  # el schema no tiene kind=subtask; el vínculo es parent_task
         )
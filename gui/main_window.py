@@ -1,10 +1,22 @@
 import tkinter as tk
 from tkinter import ttk, messagebox as mb
 import datetime as dt
-from core.config import SYNC_INTERVAL_MS, TOPMOST, WINDOW_GEOMETRY
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from core.config import TOPMOST, WINDOW_GEOMETRY
 from controller.app_controller import AppController
 from gui.task_list import ScrollableTaskList
 
+# tags constantes: todas las filas comparten la misma tupla en vez de alocar
+# una nueva por fila en cada tick de sync
+TAG_OVERDUE = ("Vencida", "#B00020")
+TAG_DONE = ("✓", "#10B981")
+TAG_CANCELLED = ("✗", "#9CA3AF")
+TAG_RECUR = ("Recurrencia", "#F59E0B")
+PRIORITY_TAGS = {p: (f"P{p}", "#F59E0B") for p in range(-5, 6)}
+_DUE_TAGS = {}  # iso date -> ("Vence ...", color); filas vecinas comparten vencimiento
+
+
 class MainWindow(tk.Tk):
     def __init__(self, controller: AppController):
         super().__init__()
@@ -32,12 +44,37 @@ class MainWindow(tk.Tk):
         menu = tk.Menu(self, tearoff=False)
         self.controller.set_menu(menu)
 
+        # pool de I/O: los GET de sync corren acá, nunca en el hilo de Tk
+        self._executor = ThreadPoolExecutor(max_workers=4)
+        self._sync_total = 0
+        self._sync_pending = 0
+        self._pending_sync = None  # after-id del coalescer de syncs
+        # _sync_after None es ambiguo ("pausado" vs "ciclo en vuelo"):
+        # minimizado se trackea aparte, lo setea <Unmap> y lo limpia <Map>
+        self._ui_paused = False
+
         self.tabs = {}  # context_id -> ContextTab
         self._build_tabs()# crea tabs y llama a sync
 
+        # polling adaptativo: sin cambios en el server el intervalo se duplica
+        # (hasta 5 min); con cambios o una edición local vuelve a 5s
+        self._current_interval_ms = 15000
+        self._sync_changed = False
+        self._auto_rearm = False
+
         # timers / binds
         self.bind("<F5>", lambda e: self._sync_all())
-        self.after(SYNC_INTERVAL_MS, self._auto_sync)
+        self.nb.bind("<<NotebookTabChanged>>", self._on_tab_changed)
+        self._sync_after = self.after(self._current_interval_ms, self._auto_sync)
+        # ventana minimizada/oculta: no tiene sentido seguir pegándole al server
+        self.bind("<Unmap>", self._pause_sync)
+        self.bind("<Map>", self._resume_sync)
+
+        # realtime SSE: mientras el stream esté sano el polling queda pausado;
+        # si se cae, el timer adaptativo vuelve a hacerse cargo
+        self._rt_ok = False
+        self.controller.subscribe_realtime(self._rt_event_from_thread,
+                                           self._rt_status_from_thread)
 
     # ---------- tabs ----------
     def _build_tabs(self):
@@ -48,41 +85,227 @@ class MainWindow(tk.Tk):
             return
         for c in contexts:
             ctx_id = c["id"]
-            tab = ContextTab(self.nb, self.controller, ctx_id, c.get("name", "Context"))
+            tab = ContextTab(self.nb, self.controller, ctx_id, c.get("name", "Context"),
+                             executor=self._executor)
             self.nb.add(tab, text=c.get("name", "Context"))
             self.tabs[ctx_id] = tab
         self._sync_all()# llama a refresh de cada tab
 
     # ---------- sync ----------
     def _sync_all(self):
-        total = 0
+        """Un solo GET trae las tareas de todos los tabs; acá se agrupan por contexto."""
+        if not self.tabs:
+            return
+        ctx_ids = list(self.tabs.keys())
+        self._sync_pending += 1
+        fut = self._executor.submit(self.controller.list_all_tasks_multi, ctx_ids)
+        fut.add_done_callback(lambda f: self.after(0, self._on_all_synced, f))
+
+    def _on_all_synced(self, fut):
+        try:
+            items = fut.result()
+        except Exception as e:
+            print("Sync error:", e)
+        else:
+            groups = defaultdict(list)
+            for t in items:
+                groups[t.get("context")].append(t)
+            self._sync_total = 0
+            for ctx_id, tab in self.tabs.items():
+                group = groups.get(ctx_id, [])
+                self._note_items_hash(tab, group)
+                self._sync_total += tab._apply(group)
+        self._sync_pending -= 1
+        if self._sync_pending <= 0:
+            self.status_var.set(f"Sincronizado {dt.datetime.now().strftime('%H:%M:%S')} · {self._sync_total} items")
+            self._rearm_auto_sync()
+
+    def _sync_visible(self):
+        """Refresca solo el tab visible; los demás quedan marcados dirty."""
+        current = self._current_tab()
+        for tab in self.tabs.values():
+            if tab is current:
+                self._refresh_tab_async(tab)
+            else:
+                tab.dirty = True
+
+    def schedule_sync(self, delay_ms: int = 150):
+        """Coalescer: varios pedidos de sync en ráfaga colapsan en uno solo."""
+        if self._pending_sync is not None:
+            self.after_cancel(self._pending_sync)
+        self._pending_sync = self.after(delay_ms, self._run_scheduled_sync)
+
+    def _run_scheduled_sync(self):
+        self._pending_sync = None
+        self._sync_all()
+
+    def _current_tab(self):
+        try:
+            selected = self.nb.select()
+        except tk.TclError:
+            return None
         for tab in self.tabs.values():
-            total += tab.refresh()
-        self.status_var.set(f"Sincronizado {dt.datetime.now().strftime('%H:%M:%S')} · {total} items")
+            if str(tab) == selected:
+                return tab
+        return None
+
+    def _on_tab_changed(self, event=None):
+        tab = self._current_tab()
+        if tab is not None and tab.dirty:
+            self._refresh_tab_async(tab)
+
+    def _refresh_tab_async(self, tab):
+        if self._sync_pending <= 0:
+            # arranca un ciclo nuevo: el contador del status bar parte de
+            # cero, no se acumula con los ciclos de polling anteriores
+            self._sync_total = 0
+        self._sync_pending += 1
+        fut = self._executor.submit(tab._fetch)
+        fut.add_done_callback(lambda f, t=tab: self.after(0, self._on_tab_synced, t, f))
+
+    def _on_tab_synced(self, tab, fut):
+        try:
+            items = fut.result()
+        except Exception as e:
+            print("Sync error:", e)
+        else:
+            self._note_items_hash(tab, items)
+            self._sync_total += tab._apply(items)
+        self._sync_pending -= 1
+        if self._sync_pending <= 0:
+            self.status_var.set(f"Sincronizado {dt.datetime.now().strftime('%H:%M:%S')} · {self._sync_total} items")
+            self._rearm_auto_sync()
 
     def _auto_sync(self):
+        # el timer NO se re-arma acá: se re-arma cuando el sync en vuelo
+        # termina, así nunca se encolan syncs superpuestos
+        self._sync_after = None
+        self._sync_changed = False
+        self._auto_rearm = True
+        self._sync_visible()
+        if self._sync_pending <= 0:
+            # sin tabs (o nada que refrescar): re-armamos igual
+            self._rearm_auto_sync()
+
+    def _note_items_hash(self, tab, items):
+        """Hash barato de (id, updated): detecta si el server devolvió lo mismo."""
+        h = hash(tuple(sorted((t["id"], t.get("updated") or "") for t in items)))
+        if h != tab._last_hash:
+            tab._last_hash = h
+            self._sync_changed = True
+
+    def _rearm_auto_sync(self):
+        if not self._auto_rearm:
+            return
+        self._auto_rearm = False
+        if self._sync_changed:
+            self._current_interval_ms = 5000
+        else:
+            self._current_interval_ms = min(self._current_interval_ms * 2, 300_000)
+        if self._sync_after is not None:
+            # alguien armó un timer mientras el ciclo estaba en vuelo (p.ej.
+            # _resume_sync al caerse el stream): cancelarlo antes de pisar el
+            # id, o queda una cadena _auto_sync duplicada imposible de parar
+            self.after_cancel(self._sync_after)
+        self._sync_after = self.after(self._current_interval_ms, self._auto_sync)
+
+    def note_user_activity(self):
+        """Una edición local: el próximo ciclo de polling vuelve al intervalo corto."""
+        self._current_interval_ms = 5000
+
+    # ---------- realtime ----------
+    def _rt_event_from_thread(self, action, record):
+        # llega desde el hilo del stream: lo cruzamos al hilo de Tk
+        try:
+            self.after(0, self._on_rt_event, action, record)
+        except (tk.TclError, RuntimeError):
+            pass
+
+    def _rt_status_from_thread(self, connected):
         try:
+            self.after(0, self._on_rt_status, connected)
+        except (tk.TclError, RuntimeError):
+            pass
+
+    def _on_rt_event(self, action, record):
+        tab = self.tabs.get((record or {}).get("context"))
+        if tab is None:
+            # contexto desconocido (tab nuevo, record raro): pull completo
+            self.schedule_sync()
+            return
+        tab._apply_realtime(action, record)
+
+    def _on_rt_status(self, connected):
+        self._rt_ok = connected
+        if connected:
+            # un sync para ponerse al día y el polling queda en pausa
+            self._pause_sync()
             self._sync_all()
-        finally:
-            self.after(SYNC_INTERVAL_MS, self._auto_sync)
+        elif self._sync_after is None and not self._auto_rearm:
+            # con _auto_rearm pendiente hay un ciclo en vuelo que va a
+            # re-armar el timer al terminar: no armamos uno paralelo
+            self._resume_sync()
+
+    def destroy(self):
+        try:
+            self.controller.close_realtime()
+        except Exception:
+            pass
+        super().destroy()
+
+    def _pause_sync(self, event=None):
+        # <Unmap>/<Map> también llegan desde widgets hijos: filtramos
+        if event is not None:
+            if event.widget is not self:
+                return
+            # minimizada: nada (ni el fallback por caída del SSE) debe
+            # reanudar el polling hasta el próximo <Map>
+            self._ui_paused = True
+        self._auto_rearm = False
+        if self._sync_after is not None:
+            self.after_cancel(self._sync_after)
+            self._sync_after = None
+
+    def _resume_sync(self, event=None):
+        if event is not None:
+            if event.widget is not self:
+                return
+            self._ui_paused = False
+        elif self._ui_paused:
+            # la ventana sigue minimizada: el caller no es <Map>, no reanuda
+            return
+        if self._rt_ok:
+            # el stream realtime sigue vivo: no hace falta volver a pollear
+            return
+        if self._sync_after is None:
+            # un sync inmediato para ponerse al día y se re-arma el timer
+            self._sync_visible()
+            self._sync_after = self.after(self._current_interval_ms, self._auto_sync)
 
     # ---------- actions ----------
     def _on_prepare_day(self):
         try:
             self.controller.prepare_day()
-            self._sync_all()
+            self.schedule_sync()
             self.status_var.set("Día preparado ✓")
         except Exception as e:
             mb.showerror("Preparar día", f"Falló preparar el día: {e}")
 
 
 class ContextTab(ttk.Frame):
-    def __init__(self, parent, controller: AppController, context_id: str, title: str):
+    def __init__(self, parent, controller: AppController, context_id: str, title: str,
+                 executor=None):
         super().__init__(parent)
         self.controller = controller
         self.context_id = context_id
+        # pool compartido de MainWindow: las mutaciones también corren ahí
+        self._executor = executor
         self._last_task_id = None
         self._tasks_by_id = {}  # cache: id -> task dict
+        self.dirty = False  # hay cambios sin refrescar (tab en background)
+        self._prev_rows = {}   # id -> (text, done, tags) del último render
+        self._prev_order = []  # ids en el orden del último render
+        self._last_hash = None  # hash (id, updated) del último sync; lo usa MainWindow
 
         # Header: quick add
         header = ttk.Frame(self)
@@ -107,64 +330,168 @@ class ContextTab(ttk.Frame):
 #        self.bind_all("<Delete>", self._kb_archive_last)
 
     # ---------- data ----------
-    def refresh(self) -> int:
+    def _submit(self, fn, done_cb, *args):
+        """Corre fn(*args) en el pool y llama done_cb(future) en el hilo de Tk.
+
+        Sin pool (tests / uso standalone) cae al camino síncrono.
+        """
+        if self._executor is None:
+            class _Now:
+                def __init__(self, fn, args):
+                    try:
+                        self._r, self._e = fn(*args), None
+                    except Exception as e:
+                        self._r, self._e = None, e
+
+                def result(self):
+                    if self._e:
+                        raise self._e
+                    return self._r
+            done_cb(_Now(fn, args))
+            return
+        fut = self._executor.submit(fn, *args)
+        fut.add_done_callback(lambda f: self.after(0, done_cb, f))
+
+    def refresh(self):
+        """Re-fetch asíncrono + apply (reconciliación tras una mutación)."""
+        self._submit(self._fetch, self._on_refreshed)
+
+    def _on_refreshed(self, fut):
         try:
-            items = self.controller.list_all_tasks(self.context_id)
+            items = fut.result()
         except Exception as e:
             print("Sync error:", e)
-            return 0
+            return
+        self._apply(items)
+
+    def _fetch(self):
+        """Solo I/O: seguro para correr en un worker thread."""
+        return self.controller.list_all_tasks(self.context_id)
 
+    def _apply(self, items) -> int:
+        """Solo UI: debe correr en el hilo de Tk."""
+        self.dirty = False
         # cache por id para callbacks del controller
         self._tasks_by_id = {t["id"]: t for t in items}
 
-        rows = []
-        today = dt.date.today()
-        for t in items:
-            tid = t["id"]
-            title = t.get("title") or t.get("text") or ""
-            parent_id = t.get("parent_task") or t.get("parent_id")
-            if parent_id:
-                title = "    " + title
-            # aunque list_open_tasks devuelve "open", lo dejo robusto:
-            done = (t.get("status") == "done")
-            cancelled = (t.get("status") == "cancelled")
-            kind = t.get("kind") or "todo"
-            recurrence = t.get("recurrence")  # si tienes este campo
-            tags = []
-
-            # Vencimiento -> tag
-            due = t.get("due_date") or t.get("due")
-            if due:
-                try:
-                    d = dt.date.fromisoformat(str(due)[:10])
-                    if d < today and not done:
-                        tags.append(("Vencida", "#B00020"))
-                    else:
-                        tags.append((f"Vence {d.isoformat()}", "#CBD5E1"))
-                    if done:
-                        tags.append(("✓", "#10B981"))
-                    if cancelled:
-                        tags.append(("✗", "#9CA3AF"))
-                    if recurrence:
-                        tags.append(("Recurrencia", "#F59E0B"))
-                except Exception:
-                    tags.append((str(due), "#CBD5E1"))
-
-            # Prioridad -> tag
-            pri = t.get("priority", 0)
-            if pri:
-                tags.append((f"P{pri}", "#F59E0B"))
-
-            rows.append({
-                "id": tid,
-                "text": title,
-                "done": done,
-                "tags": tags,
-            })
-
-        self.task_list.set_tasks(rows)
+        # invariantes fuera del loop: una sola llamada a today() por refresh
+        today_iso = dt.date.today().isoformat()
+        rows = [self._build_row(t, today_iso) for t in items]
+
+        self._apply_rows(rows)
         return len(items)
 
+    def _build_row(self, t, today_iso):
+        """Convierte un task dict del backend en la fila que consume el widget."""
+        tid = t["id"]
+        title = t.get("title") or t.get("text") or ""
+        parent_id = t.get("parent_task") or t.get("parent_id")
+        if parent_id:
+            title = "    " + title
+        # aunque list_open_tasks devuelve "open", lo dejo robusto:
+        status = t.get("status")
+        done = (status == "done")
+        cancelled = (status == "cancelled")
+        kind = t.get("kind") or "todo"
+        recurrence = t.get("recurrence")  # si tienes este campo
+        tags = []
+
+        # Vencimiento -> tag
+        due = t.get("due_date") or t.get("due")
+        if due:
+            due_iso = str(due)[:10]
+            # las fechas ISO ordenan lexicográficamente: alcanza con
+            # comparar strings, sin fromisoformat ni try/except por fila
+            if len(due_iso) == 10 and due_iso[4] == "-" and due_iso[7] == "-":
+                if due_iso < today_iso and not done:
+                    tags.append(TAG_OVERDUE)
+                else:
+                    tag = _DUE_TAGS.get(due_iso)
+                    if tag is None:
+                        tag = _DUE_TAGS.setdefault(due_iso, (f"Vence {due_iso}", "#CBD5E1"))
+                    tags.append(tag)
+                if done:
+                    tags.append(TAG_DONE)
+                if cancelled:
+                    tags.append(TAG_CANCELLED)
+                if recurrence:
+                    tags.append(TAG_RECUR)
+            else:
+                tags.append((str(due), "#CBD5E1"))
+
+        # Prioridad -> tag
+        pri = t.get("priority", 0)
+        if pri:
+            tags.append(PRIORITY_TAGS.get(pri) or (f"P{pri}", "#F59E0B"))
+
+        return {
+            "id": tid,
+            "text": title,
+            "done": done,
+            "tags": tags,
+        }
+
+    def _apply_rows(self, rows):
+        """Aplica solo el diff contra el último render en vez de reconstruir todo."""
+        new_sigs = {r["id"]: (r["text"], r["done"], tuple(r["tags"])) for r in rows}
+        new_order = [r["id"] for r in rows]
+        prev = self._prev_rows
+
+        # si el orden relativo de las filas que sobreviven cambió, reconstruimos
+        survivors_old = [tid for tid in self._prev_order if tid in new_sigs]
+        survivors_new = [tid for tid in new_order if tid in prev]
+        if survivors_old != survivors_new:
+            self.task_list.set_tasks(rows)
+        else:
+            for tid in prev:
+                if tid not in new_sigs:
+                    self.task_list.remove_task(tid)
+            for i, r in enumerate(rows):
+                tid = r["id"]
+                old = prev.get(tid)
+                if old is None:
+                    # en su posición del orden del server, no al final: las
+                    # filas previas a `i` ya están colocadas en ese orden
+                    self.task_list.insert_task(tid, r["text"], r["done"], r["tags"], index=i)
+                elif old != new_sigs[tid]:
+                    self.task_list.update_task(tid, text=r["text"], done=r["done"], tags=r["tags"])
+
+        self._prev_rows = new_sigs
+        self._prev_order = new_order
+
+    def _apply_realtime(self, action, record):
+        """Aplica un evento del stream SSE (ya marshalled al hilo de Tk)."""
+        tid = record.get("id")
+        if not tid:
+            return
+        if action == "delete" or record.get("status") == "archived":
+            if tid in self._prev_rows:
+                self._tasks_by_id.pop(tid, None)
+                self._prev_rows.pop(tid, None)
+                if tid in self._prev_order:
+                    self._prev_order.remove(tid)
+                self.task_list.remove_task(tid)
+            return
+        self._tasks_by_id[tid] = record
+        row = self._build_row(record, dt.date.today().isoformat())
+        sig = (row["text"], row["done"], tuple(row["tags"]))
+        if tid in self._prev_rows:
+            if self._prev_rows[tid] != sig:
+                self._prev_rows[tid] = sig
+                self.task_list.update_task(tid, text=row["text"], done=row["done"], tags=row["tags"])
+        else:
+            # el orden fino lo corrige el próximo pull completo; mientras,
+            # la fila nueva va al final
+            self._prev_rows[tid] = sig
+            self._prev_order.append(tid)
+            self.task_list.insert_task(tid, row["text"], row["done"], row["tags"])
+
+    def _note_activity(self):
+        """Avisa a MainWindow que hubo una edición local (re-tensa el polling)."""
+        win = self.winfo_toplevel()
+        if hasattr(win, "note_user_activity"):
+            win.note_user_activity()
+
     # ---------- callbacks desde el widget ----------
     def _on_toggle_cb(self, task_id: str, done: bool):
         """El controller necesita el dict completo -> usamos el cache."""
@@ -172,12 +499,28 @@ class ContextTab(ttk.Frame):
         task = self._tasks_by_id.get(task_id)
         if not task:
             return
+        # el widget ya pintó el nuevo estado: PATCHeamos el estado EXPLÍCITO
+        # (no toggle_done, que invierte de nuevo lo que acabamos de mutar)
+        new_status = "done" if done else "open"
+        task["status"] = new_status
+        # la firma del último render también refleja el estado optimista:
+        # si el PATCH falla, el refresh detecta la diferencia y revierte la fila
+        sig = self._prev_rows.get(task_id)
+        if sig:
+            self._prev_rows[task_id] = (sig[0], done, sig[2])
+        self._note_activity()
+        self._submit(lambda: self.controller.update_task(task_id, status=new_status),
+                     self._on_toggled)
+
+    def _on_toggled(self, fut):
         try:
-            self.controller.toggle_done(task)
+            t = fut.result()
         except Exception as e:
             print("Toggle error:", e)
-        finally:
+            # revertimos con el estado real del server
             self.refresh()
+            return
+        self._tasks_by_id[t["id"]] = t
 
     def _on_menu_cb(self, task_id: str):
         self._last_task_id = task_id
@@ -207,24 +550,37 @@ class ContextTab(ttk.Frame):
         text = self.entry.get().strip()
         if not text:
             return
+        # limpiamos el entry de una (optimista); el POST corre en el pool
+        self.entry.delete(0, "end")
+        self._note_activity()
+        self._submit(self.controller.add_task, lambda f, tx=text: self._on_added(f, tx),
+                     self.context_id, text)
+
+    def _on_added(self, fut, text):
         try:
-            self.controller.add_task(self.context_id, text)
+            t = fut.result()
         except Exception as e:
             print("Add error:", e)
-        finally:
-            self.entry.delete(0, "end")
-            self.refresh()
+            # devolvemos el texto al entry para que no se pierda lo tipeado
+            if not self.entry.get():
+                self.entry.insert(0, text)
+            return
+        # la respuesta del create ya trae la tarea: append local, sin re-fetch
+        self._tasks_by_id[t["id"]] = t
+        row = self._build_row(t, dt.date.today().isoformat())
+        self._prev_rows[t["id"]] = (row["text"], row["done"], tuple(row["tags"]))
+        self._prev_order.append(t["id"])
+        self.task_list.insert_task(t["id"], row["text"], row["done"], row["tags"])
 
     # ---------- atajos de teclado ----------
     def _kb_toggle_last(self, event=None):
         if not self._last_task_id:
             return
-        # lectura del estado visible y toggle
-        row = self.task_list._rows.get(self._last_task_id)
-        if not row:
+        # estado desde el modelo del widget (la fila puede no estar materializada)
+        if self._last_task_id not in self.task_list._index:
             return
         # no necesitamos 'done' exacto porque el controller hace toggle:
-        self._on_toggle_cb(self._last_task_id, not bool(row.var.get()))
+        self._on_toggle_cb(self._last_task_id, not self.task_list.is_done(self._last_task_id))
 
     def _kb_archive_last(self, event=None):
         if self._last_task_id:
@@ -235,11 +591,20 @@ class ContextTab(ttk.Frame):
         task = self._tasks_by_id.get(task_id)
         if not task:
             return
+        # sacamos la fila de inmediato (optimista) y el PATCH sale en el pool;
+        # si falla, un refresh la trae de vuelta
+        self._tasks_by_id.pop(task_id, None)
+        self._prev_rows.pop(task_id, None)
+        if task_id in self._prev_order:
+            self._prev_order.remove(task_id)
+        self.task_list.remove_task(task_id)
+        self._submit(self.controller.archive, self._on_archived, task)
+
+    def _on_archived(self, fut):
         try:
-            self.controller.archive(task)
+            fut.result()
         except Exception as e:
             print("Archive error:", e)
-        finally:
             self.refresh()
 
     def _edit_task(self, task_id: str):
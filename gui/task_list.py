@@ -3,7 +3,7 @@ Scrollable Task List widget for Tkinter
 --------------------------------------
 A drop-in replacement for a Treeview-based task list. It renders each task as
 its own row (a Frame) inside a scrollable Canvas, with:
-- a Checkbutton to mark completion
+- a checkbox (clickable glyph label) to mark completion
 - the task text (wrapping/expand)
 - optional colored tags (labels)
 - an overflow/menu button (⋮) and a "+" button for quick subtask add
@@ -19,10 +19,25 @@ Author: ChatGPT (DSN project)
 Tested: Python 3.12+, Tkinter (ttk)
 """
 from __future__ import annotations
+import functools
+from contextlib import contextmanager
 from typing import Callable, Dict, List, Optional, Tuple
 import tkinter as tk
 from tkinter import ttk
 
+# glifos del checkbox dibujado con Label (sin BooleanVar por fila)
+CHK_OFF = "☐"
+CHK_ON = "☑"
+
+# flyweight de tags: las mismas combinaciones (("P2", "#F59E0B"),) se repiten
+# en cientos de filas; internarlas permite comparar por identidad (is) en el
+# camino caliente de set_tags en vez de comparar elemento a elemento
+_TAG_INTERN: Dict[tuple, tuple] = {}
+
+def _intern_tags(tags) -> tuple:
+    key = tuple(tags)
+    return _TAG_INTERN.setdefault(key, key)
+
 class TaskRow(ttk.Frame):
     """A single task row with checkbox, text, colored tags, and action buttons."""
     def __init__(
@@ -36,34 +51,41 @@ class TaskRow(ttk.Frame):
         on_menu: Optional[Callable[[str], None]] = None,
         on_add_subtask: Optional[Callable[[str], None]] = None,
         wrap: int = 600,):
-        super().__init__(master)
+        super().__init__(master, style="Task.Row.TFrame")
         self.task_id = task_id
         self._on_toggle = on_toggle
         self._on_menu = on_menu
         self._on_add_subtask = on_add_subtask
-        self.var = tk.BooleanVar(value=done)
+        self._done = bool(done)
 
         self.columnconfigure(2, weight=1)
 
-        # Checkbox
-        self.chk = ttk.Checkbutton(self, variable=self.var, command=self._toggle)
+        # Checkbox barato: un Label con glifo ☐/☑ y un bind de click.
+        # ttk.Checkbutton requiere una BooleanVar (variable Tcl + trace) por
+        # fila, que es justo lo que no queremos pagar en cientos de filas
+        # recicladas; acá el estado es un bool de Python y listo.
+        self.chk = ttk.Label(self, text=CHK_ON if done else CHK_OFF,
+                             style="Task.Chk.TLabel")
         self.chk.grid(row=0, column=0, padx=(8, 6), pady=4, sticky="w")
+        self.chk.bind("<Button-1>", self._toggle)
 
         # Text label (wrapping)
         self.lbl = ttk.Label(self, text=text, wraplength=wrap, anchor="w", justify="left")
         self.lbl.grid(row=0, column=2, sticky="we")
 
-        # Tag container
-        self.tag_container = ttk.Frame(self)
-        self.tag_container.grid(row=1, column=2, sticky="w", pady=(2, 4))
-
-        # Actions (⋮ and +)
-        self.menu_btn = ttk.Button(self, text="⋮", width=2, command=self._menu)
-        self.menu_btn.grid(row=0, column=3, padx=(6, 4))
-        self.add_btn = ttk.Button(self, text="+", width=2, command=self._add_subtask)
-        self.add_btn.grid(row=0, column=4, padx=(0, 8))
-
-        self._render_tags(tags or [])
+        # Widgets secundarios diferidos: el contenedor de tags solo existe si
+        # la tarea tiene tags, y los botones ⋮/+ recién cuando el puntero
+        # entra a la fila (no se puede clickear sin pasar por <Enter>).
+        # Una fila pelada queda en 2 widgets en vez de 5.
+        self.tag_container: Optional[ttk.Frame] = None
+        self.menu_btn: Optional[ttk.Button] = None
+        self.add_btn: Optional[ttk.Button] = None
+        self.bind("<Enter>", self._ensure_buttons)
+
+        # estado actual de tags (tupla internada) para render incremental
+        self._tags: Tuple[Tuple[str, str], ...] = _intern_tags(())
+        self._tag_widgets: List[tk.Label] = []
+        self.set_tags(tags or [])
         self._apply_done_style(done)
         #self.bind("<Destroy>", lambda e: print("[DESTROY]", self, "task_id=", self.task_id))
     
@@ -72,19 +94,30 @@ class TaskRow(ttk.Frame):
         self.lbl.configure(text=text)
 
     def set_done(self, done: bool):
-        self.var.set(done)
+        self._done = bool(done)
+        self.chk.configure(text=CHK_ON if done else CHK_OFF)
         self._apply_done_style(done)
 
     def set_tags(self, tags: List[Tuple[str, str]]):
-        for child in self.tag_container.winfo_children():
-            child.destroy()
-        self._render_tags(tags)
-
-    # --- Internals ---
-    def _render_tags(self, tags: List[Tuple[str, str]]):
-        for i, (label, color) in enumerate(tags):
-            # Use tk.Label to allow background color without ttk style plumbing
-            tag = tk.Label(
+        """Render incremental: solo se tocan los labels que cambiaron."""
+        tags = _intern_tags(tags)
+        if tags is self._tags:
+            return  # misma tupla internada: ni siquiera comparamos elementos
+        if tags and self.tag_container is None:
+            self.tag_container = ttk.Frame(self, style="Task.Row.TFrame")
+            self.tag_container.grid(row=1, column=2, sticky="w", pady=(2, 4))
+        widgets = self._tag_widgets
+        common = min(len(self._tags), len(tags))
+        for i in range(common):
+            if self._tags[i] != tags[i]:
+                label, color = tags[i]
+                widgets[i].configure(text=label, bg=color, fg=_ideal_text_color(color))
+        # cola sobrante: destruir; nuevas al final: crear
+        for w in widgets[len(tags):]:
+            w.destroy()
+        del widgets[len(tags):]
+        for label, color in tags[common:]:
+            w = tk.Label(
                 self.tag_container,
                 text=label,
                 bg=color,
@@ -94,7 +127,27 @@ class TaskRow(ttk.Frame):
                 borderwidth=0,
                 relief="flat",
             )
-            tag.pack(side="left", padx=(0, 6))
+            w.pack(side="left", padx=(0, 6))
+            widgets.append(w)
+        self._tags = tags
+
+    def rebind(self, task_id: str, text: str, done: bool, tags: List[Tuple[str, str]]):
+        """Reusa este widget para otra tarea (patrón recycler-view)."""
+        self.task_id = task_id
+        self.set_text(text)
+        self.set_done(done)
+        self.set_tags(tags)
+
+    # --- Internals ---
+    def _ensure_buttons(self, _event=None):
+        if self.menu_btn is not None:
+            return
+        self.menu_btn = ttk.Button(self, text="⋮", command=self._menu,
+                                   style="Task.Action.TButton")
+        self.menu_btn.grid(row=0, column=3, padx=(6, 4))
+        self.add_btn = ttk.Button(self, text="+", command=self._add_subtask,
+                                  style="Task.Action.TButton")
+        self.add_btn.grid(row=0, column=4, padx=(0, 8))
 
     def _apply_done_style(self, done: bool):
         if done:
@@ -102,11 +155,10 @@ class TaskRow(ttk.Frame):
         else:
             self.lbl.configure(style="Task.Normal.TLabel")
 
-    def _toggle(self):
-        done = bool(self.var.get())
-        self._apply_done_style(done)
+    def _toggle(self, _event=None):
+        self.set_done(not self._done)
         if self._on_toggle:
-            self._on_toggle(self.task_id, done)
+            self._on_toggle(self.task_id, self._done)
         #self.event_generate("<<TaskToggle>>", when="tail")
 
     def _menu(self):
@@ -121,7 +173,14 @@ class TaskRow(ttk.Frame):
 
 
 class ScrollableTaskList(ttk.Frame):
-    """Canvas + interior Frame pattern with proper mousewheel support and API."""
+    """Virtualized canvas list: only viewport rows get real widgets.
+
+    The task data lives in a plain ``list[dict]`` plus an ``id -> index`` map;
+    ``TaskRow`` widgets are materialized lazily for the visible index span
+    (plus a small overscan) and placed at absolute ``y = index * row_height``
+    via ``canvas.create_window``. Row height is estimated from the first
+    materialized row, so set_tasks/insert cost O(viewport), not O(N).
+    """
     def __init__(
         self,
         master,
@@ -130,6 +189,7 @@ class ScrollableTaskList(ttk.Frame):
         on_add_subtask: Optional[Callable[[str], None]] = None,
         row_wrap: int = 600,
         row_padding: Tuple[int, int] = (2, 2),
+        overscan: int = 5,
         **kwargs,
     ):
         super().__init__(master, **kwargs)
@@ -138,34 +198,58 @@ class ScrollableTaskList(ttk.Frame):
         self._on_add_subtask = on_add_subtask
         self._row_wrap = row_wrap
         self._row_padding = row_padding
+        self._overscan = overscan
+
+        # modelo plano de datos + filas realmente materializadas (viewport)
+        self._tasks: List[Dict] = []
+        self._index: Dict[str, int] = {}
         self._rows: Dict[str, TaskRow] = {}
+        self._row_wins: Dict[str, int] = {}  # task_id -> canvas window id
+        self._row_height: Optional[int] = None
+        # pool de TaskRow reciclables: crear un widget Tk es lo caro, así que
+        # las filas que salen del viewport se guardan y se rebindean al entrar
+        self._pool: List[TaskRow] = []
+        self._pool_cap = 40
+
+        # coalescer de reflows: N mutaciones -> 1 solo scrollregion+reconcile
+        self._dirty = False
+        self._flush_scheduled = False
+        self._in_batch = 0
+
+        # coalescer de rueda: los trackpads emiten eventos a 100-400 Hz,
+        # acumulamos deltas y aplicamos como mucho uno cada ~16 ms
+        self._wheel_accum = 0
+        self._wheel_after = None
+
+        # último ancho aplicado a windows/wraplength (memo de <Configure>)
+        self._last_width = -1
+        # última scrollregion configurada en el canvas (memo)
+        self._last_region: Optional[Tuple[int, int, int, int]] = None
 
         # --- styles ---
+        # plantillas compartidas: se registran una vez acá y cada TaskRow las
+        # referencia por nombre; N filas no pagan N configure() de estilo
         style = ttk.Style(self)
         style.configure("Task.Normal.TLabel")
         style.configure("Task.Done.TLabel", foreground="#888888")
+        style.configure("Task.Row.TFrame")
+        style.configure("Task.Chk.TLabel", font=("TkDefaultFont", 12))
+        style.configure("Task.Action.TButton", width=2)
 
         # --- layout ---
         self.canvas = tk.Canvas(self, highlightthickness=0)
         self.vbar = ttk.Scrollbar(self, orient="vertical", command=self.canvas.yview)
-        self.canvas.configure(yscrollcommand=self.vbar.set)
+        self.canvas.configure(yscrollcommand=self._on_yscroll)
 
         self.canvas.grid(row=0, column=0, sticky="nsew")
         self.vbar.grid(row=0, column=1, sticky="ns")
         self.rowconfigure(0, weight=1)
         self.columnconfigure(0, weight=1)
 
-        # Interior frame inside canvas
-        self.interior = ttk.Frame(self.canvas)
-        self._win_id = self.canvas.create_window(0, 0, window=self.interior, anchor="nw")
-
-        # Resize/wrapping sync
-        self.interior.bind("<Configure>", self._on_interior_configure)
         self.canvas.bind("<Configure>", self._on_canvas_configure)
 
         # Mousewheel support (Windows/macOS/Linux)
         self._bind_mousewheel(self.canvas)
-        self._bind_mousewheel(self.interior)
 
     # --- Public API ---
     def set_tasks(self, tasks: List[Dict]):
@@ -176,45 +260,56 @@ class ScrollableTaskList(ttk.Frame):
             'tags': List[Tuple[label, color]]
         }
         """
-        # clear
-        for row in list(self._rows.values()):
-            row.destroy()
-        self._rows.clear()
-
-        for task in tasks:
-            self.insert_task(
-                task_id=task["id"],
-                text=task.get("text", ""),
-                done=task.get("done", False),
-                tags=task.get("tags", []),
-            )
-
-        self._repack_rows()
-
-    def insert_task(self, task_id: str, text: str, done: bool = False, tags: Optional[List[Tuple[str, str]]] = None):
-        if task_id in self._rows:
+        self._tasks = [
+            {
+                "id": t["id"],
+                "text": t.get("text", ""),
+                "done": t.get("done", False),
+                "tags": _intern_tags(t.get("tags", ())),
+            }
+            for t in tasks
+        ]
+        self._index = {t["id"]: i for i, t in enumerate(self._tasks)}
+        # filas ya materializadas: las que siguen existiendo se reconfiguran,
+        # las que no, se destruyen; _reconcile_visible cubre el resto
+        for tid, row in list(self._rows.items()):
+            i = self._index.get(tid)
+            if i is None:
+                self._drop_row(tid)
+            else:
+                t = self._tasks[i]
+                row.set_text(t["text"])
+                row.set_done(t["done"])
+                row.set_tags(t["tags"])
+        self._schedule_flush()
+
+    def insert_task(self, task_id: str, text: str, done: bool = False,
+                    tags: Optional[List[Tuple[str, str]]] = None,
+                    index: Optional[int] = None):
+        if task_id in self._index:
             return
-        row = TaskRow(
-            self.interior,
-            task_id=task_id,
-            text=text,
-            done=done,
-            tags=tags or [],
-            on_toggle=self._on_toggle,
-            on_menu=self._on_menu,
-            on_add_subtask=self._on_add_subtask,
-            wrap=self._row_wrap,
-        )
-        self._rows[task_id] = row
-        row.grid(sticky="we", padx=(8, 8), pady=self._row_padding)
-        self.interior.columnconfigure(0, weight=1)
-        self._update_scrollregion()
+        task = {"id": task_id, "text": text, "done": done,
+                "tags": _intern_tags(tags or ())}
+        if index is None or index >= len(self._tasks):
+            self._tasks.append(task)
+            self._index[task_id] = len(self._tasks) - 1
+        else:
+            # inserción en medio: reindexamos desde la posición afectada
+            index = max(index, 0)
+            self._tasks.insert(index, task)
+            for i in range(index, len(self._tasks)):
+                self._index[self._tasks[i]["id"]] = i
+        self._schedule_flush()
 
     def remove_task(self, task_id: str):
-        row = self._rows.pop(task_id, None)
-        if row:
-            row.destroy()
-            self._update_scrollregion()
+        i = self._index.pop(task_id, None)
+        if i is None:
+            return
+        del self._tasks[i]
+        for t in self._tasks[i:]:
+            self._index[t["id"]] -= 1
+        self._drop_row(task_id)
+        self._schedule_flush()
 
     def update_task(
         self,
@@ -224,75 +319,264 @@ class ScrollableTaskList(ttk.Frame):
         done: Optional[bool] = None,
         tags: Optional[List[Tuple[str, str]]] = None,
     ):
-        row = self._rows.get(task_id)
-        if not row:
+        i = self._index.get(task_id)
+        if i is None:
             return
+        t = self._tasks[i]
         if text is not None:
-            row.set_text(text)
+            t["text"] = text
         if done is not None:
-            row.set_done(done)
+            t["done"] = done
         if tags is not None:
-            row.set_tags(tags)
-        self._update_scrollregion()
+            t["tags"] = tags = _intern_tags(tags)
+        row = self._rows.get(task_id)
+        if row is not None:
+            if text is not None:
+                row.set_text(text)
+            if done is not None:
+                row.set_done(done)
+            if tags is not None:
+                row.set_tags(tags)
+
+    def is_done(self, task_id: str) -> bool:
+        i = self._index.get(task_id)
+        return bool(self._tasks[i]["done"]) if i is not None else False
 
     def scroll_to_task(self, task_id: str):
-        row = self._rows.get(task_id)
-        if not row:
+        # geometría puramente aritmética (índice * alto de fila): nada de
+        # bbox() ni update_idletasks para ubicar la fila
+        i = self._index.get(task_id)
+        if i is None:
             return
-        self.canvas.update_idletasks()
-        # Ensure row is visible by yview moveto based on row's y
-        bbox = self.canvas.bbox(self._win_id)
-        if not bbox:
+        # span estrictamente visible (sin overscan): si la fila ya se ve,
+        # no movemos nada ni re-materializamos
+        first, last = self._visible_span()
+        if first + self._overscan <= i <= last - self._overscan:
             return
-        y = row.winfo_y()
-        height = self.interior.winfo_height()
-        if height > 0:
-            self.canvas.yview_moveto(y / height)
+        total = self._virtual_height()
+        if total > 0:
+            self.canvas.yview_moveto((i * self._row_height_or_estimate()) / total)
+
+    @contextmanager
+    def batch_update(self):
+        """Suprime los flushes intermedios: N mutaciones, un solo reflow."""
+        self._in_batch += 1
+        try:
+            yield self
+        finally:
+            self._in_batch -= 1
+            if self._in_batch == 0 and self._dirty:
+                self._flush()
 
     # --- Internals ---
-    def _repack_rows(self):
-        for i, row in enumerate(self._rows.values()):
-            row.grid_configure(row=i)
+    def _schedule_flush(self):
+        self._dirty = True
+        if self._in_batch or self._flush_scheduled:
+            return
+        self._flush_scheduled = True
+        self.after_idle(self._flush)
+
+    def _flush(self):
+        self._flush_scheduled = False
+        if not self._dirty:
+            return
+        self._dirty = False
         self._update_scrollregion()
+        self._reconcile_visible()
+
+    def _row_height_or_estimate(self) -> int:
+        if self._row_height is not None:
+            return self._row_height
+        # estimación previa a la primera medición real
+        return 56 + self._row_padding[0] + self._row_padding[1]
+
+    def _virtual_height(self) -> int:
+        return len(self._tasks) * self._row_height_or_estimate()
 
     def _update_scrollregion(self):
+        # la región es puro cálculo (N * alto de fila), nunca bbox("all");
+        # y si no cambió desde el último flush, ni siquiera tocamos el canvas
+        width = max(self.canvas.winfo_width(), 1)
+        region = (0, 0, width, self._virtual_height())
+        if region == self._last_region:
+            return
+        self._last_region = region
+        self.canvas.configure(scrollregion=region)
+
+    def _visible_span(self) -> Tuple[int, int]:
+        """Rango [first, last] de índices a materializar según el yview actual."""
+        n = len(self._tasks)
+        if n == 0:
+            return (0, -1)
+        rh = self._row_height_or_estimate()
+        total = n * rh
+        top = self.canvas.yview()[0] * total
+        height = max(self.canvas.winfo_height(), 1)
+        first = max(0, int(top // rh) - self._overscan)
+        last = min(n - 1, int((top + height) // rh) + self._overscan)
+        return (first, last)
+
+    def _reconcile_visible(self):
+        """Materializa/destruye/reposiciona filas para cubrir solo el viewport."""
+        first, last = self._visible_span()
+        needed = {self._tasks[i]["id"] for i in range(first, last + 1)}
+
+        for tid in [tid for tid in self._rows if tid not in needed]:
+            self._drop_row(tid)
+
+        if last < first:
+            return
+        rh = self._row_height_or_estimate()
+        width = max(self.canvas.winfo_width(), 1)
+        for i in range(first, last + 1):
+            t = self._tasks[i]
+            tid = t["id"]
+            y = i * rh
+            row = self._rows.get(tid)
+            if row is None:
+                if self._pool:
+                    row = self._pool.pop()
+                    row.rebind(tid, t["text"], t["done"], t["tags"])
+                    row.lbl.configure(wraplength=self._row_wrap)
+                else:
+                    row = TaskRow(
+                        self.canvas,
+                        task_id=tid,
+                        text=t["text"],
+                        done=t["done"],
+                        tags=t["tags"],
+                        on_toggle=self._on_toggle,
+                        on_menu=self._on_menu,
+                        on_add_subtask=self._on_add_subtask,
+                        wrap=self._row_wrap,
+                    )
+                self._rows[tid] = row
+                self._row_wins[tid] = self.canvas.create_window(
+                    0, y, anchor="nw", width=width, window=row, tags=("row",)
+                )
+                if self._row_height is None:
+                    self._measure_row_height(row)
+            else:
+                self.canvas.coords(self._row_wins[tid], 0, y)
+
+    def _measure_row_height(self, row: "TaskRow"):
+        # único update_idletasks que queda en el widget, y solo fuera de un
+        # batch_update: dentro del batch seguimos con la estimación y la
+        # medición real sale sola en el flush final
+        if self._in_batch:
+            return
         self.update_idletasks()
-        self.canvas.configure(scrollregion=self.canvas.bbox("all"))
+        measured = row.winfo_reqheight()
+        if measured > 1:
+            self._row_height = measured + self._row_padding[0] + self._row_padding[1]
+            self._update_scrollregion()
 
-    def _on_interior_configure(self, _):
-        self._update_scrollregion()
+    def _drop_row(self, task_id: str):
+        win = self._row_wins.pop(task_id, None)
+        if win is not None:
+            self.canvas.delete(win)
+        row = self._rows.pop(task_id, None)
+        if row is not None:
+            if len(self._pool) < self._pool_cap:
+                self._pool.append(row)  # queda sin window item: no se dibuja
+            else:
+                row.destroy()
+
+    def _on_yscroll(self, first, last):
+        # proxy del yscrollcommand: además de mover la barra, re-materializa
+        self.vbar.set(first, last)
+        self._reconcile_visible()
 
     def _on_canvas_configure(self, event):
-        # Keep interior width synced to canvas for wrapping
-        self.canvas.itemconfigure(self._win_id, width=event.width)
-        # Adjust wraplength for labels
+        # los <Configure> llegan en ráfaga durante un resize interactivo y
+        # muchos no cambian el ancho (solo alto): memoizamos el último ancho
+        # aplicado y salimos temprano si coincide
+        if event.width == self._last_width:
+            return
+        self._last_width = event.width
+        self._row_wrap = event.width - 160  # some space for buttons
+        for win in self._row_wins.values():
+            self.canvas.itemconfigure(win, width=event.width)
         for row in self._rows.values():
-            row.lbl.configure(wraplength=event.width - 160)  # some space for buttons
+            row.lbl.configure(wraplength=self._row_wrap)
+        self._update_scrollregion()
+        self._reconcile_visible()
 
     # Mousewheel helpers
+    # única lista dueña del bind_all de rueda en toda la app: si dos listas
+    # (o un <Leave> fuera de orden) compiten, solo la dueña puede soltarlo
+    _wheel_owner = None
+
     def _bind_mousewheel(self, widget):
-        widget.bind_all("<MouseWheel>", self._on_mousewheel_windows_mac, add="+")
-        widget.bind_all("<Button-4>", self._on_mousewheel_linux, add="+")
-        widget.bind_all("<Button-5>", self._on_mousewheel_linux, add="+")
+        # bind_all incondicional filtraba: cada lista viva (una por pestaña)
+        # recibía todos los eventos de rueda de toda la app, y las destruidas
+        # dejaban handlers colgados. Solo la lista bajo el puntero se engancha
+        # al binding global, y lo suelta al salir o al destruirse.
+        widget.bind("<Enter>", self._grab_mousewheel)
+        widget.bind("<Leave>", self._release_mousewheel)
+        widget.bind("<Destroy>", self._drop_mousewheel, add="+")
+
+    def _grab_mousewheel(self, _event=None):
+        ScrollableTaskList._wheel_owner = self
+        self.canvas.bind_all("<MouseWheel>", self._on_mousewheel_windows_mac)
+        self.canvas.bind_all("<Button-4>", self._on_mousewheel_linux)
+        self.canvas.bind_all("<Button-5>", self._on_mousewheel_linux)
+
+    def _release_mousewheel(self, event=None):
+        # las filas son hijas del canvas: entrar a una genera un <Leave>
+        # del canvas (NotifyInferior). Si el puntero sigue dentro de la
+        # lista, el binding NO se suelta — si no, la rueda moriría justo
+        # cuando el cursor está sobre las filas.
+        if event is not None:
+            try:
+                w = self.winfo_containing(event.x_root, event.y_root)
+            except (tk.TclError, KeyError):
+                w = None
+            while w is not None:
+                if w is self:
+                    return
+                w = getattr(w, "master", None)
+        self._drop_mousewheel()
+
+    def _drop_mousewheel(self, _event=None):
+        if ScrollableTaskList._wheel_owner is not self:
+            return  # otra lista ya tomó la rueda: no le pisamos el bind_all
+        ScrollableTaskList._wheel_owner = None
+        try:
+            self.canvas.unbind_all("<MouseWheel>")
+            self.canvas.unbind_all("<Button-4>")
+            self.canvas.unbind_all("<Button-5>")
+        except tk.TclError:
+            pass  # <Destroy> puede llegar con el intérprete ya desmontando
 
     def _on_mousewheel_windows_mac(self, event):
         # On Windows, event.delta is usually +/-120; on macOS it's different.
-        delta = int(-1 * (event.delta / 120))
-        self.canvas.yview_scroll(delta, "units")
+        self._queue_wheel(int(-1 * (event.delta / 120)))
 
     def _on_mousewheel_linux(self, event):
         if event.num == 4:
-            self.canvas.yview_scroll(-1, "units")
+            self._queue_wheel(-1)
         elif event.num == 5:
-            self.canvas.yview_scroll(1, "units")
+            self._queue_wheel(1)
+
+    def _queue_wheel(self, units: int):
+        # acumula y difiere: N eventos de rueda en la misma ventana de ~16 ms
+        # producen un solo yview_scroll (y por ende un solo reconcile)
+        self._wheel_accum += units
+        if self._wheel_after is None:
+            self._wheel_after = self.after(16, self._flush_wheel)
+
+    def _flush_wheel(self):
+        self._wheel_after = None
+        units, self._wheel_accum = self._wheel_accum, 0
+        if units:
+            self.canvas.yview_scroll(units, "units")
 
 
 # --- Utility: pick readable text color for a given bg ---
-def _ideal_text_color(bg_hex: str) -> str:
-    """Return black or white depending on background brightness."""
-    bg_hex = bg_hex.strip().lstrip('#')
-    if len(bg_hex) == 3:
-        bg_hex = ''.join(c*2 for c in bg_hex)
+@functools.lru_cache(maxsize=256)
+def _compute_text_color(bg_hex: str) -> str:
+    """Camino lento (parse hex + luminancia); cacheado por color normalizado."""
     try:
         r = int(bg_hex[0:2], 16)
         g = int(bg_hex[2:4], 16)
@@ -304,6 +588,30 @@ def _ideal_text_color(bg_hex: str) -> str:
     return "black" if luminance > 186 else "white"
 
 
+# Paleta fija de la app (los colores de tag que usa main_window): el fg se
+# precalcula una vez al importar y el camino caliente es un dict.get con la
+# string tal cual llega, sin strip/normalización ni hash del lru_cache.
+# Colores fuera de la paleta caen al camino cacheado de siempre.
+PALETTE_FG = {c: _compute_text_color(c.lstrip('#').lower()) for c in (
+    "#B00020",   # Vencida
+    "#10B981",   # ✓ done
+    "#9CA3AF",   # ✗ cancelled
+    "#F59E0B",   # Recurrencia / prioridad
+    "#CBD5E1",   # Vence <fecha>
+)}
+
+
+def _ideal_text_color(bg_hex: str) -> str:
+    """Return black or white depending on background brightness."""
+    fg = PALETTE_FG.get(bg_hex)
+    if fg is not None:
+        return fg
+    bg_hex = bg_hex.strip().lstrip('#').lower()
+    if len(bg_hex) == 3:
+        bg_hex = ''.join(c*2 for c in bg_hex)
+    return _compute_text_color(bg_hex)
+
+
 
 
 
@@ -3,7 +3,33 @@
 # Ejecutar con:  python pb_bootstrap.py
 
 import sys
+import json
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# httpx si está instalado: HTTP/2 multiplexa los upserts sobre una sola
+# conexión cuando el server lo habilita; si no, requests con pool keep-alive
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+# orjson si está instalado para serializar los payloads (las specs de tasks
+# son grandes); mismo guard opcional que en storage.pocketbase
+try:
+    import orjson as _fastjson
+
+    def _dumps(obj) -> bytes:
+        return _fastjson.dumps(obj)
+except ImportError:
+    def _dumps(obj) -> bytes:
+        return json.dumps(obj).encode()
+
+# requests manda bytes con data=, httpx con content=
+_BODY_KW = "data" if httpx is None else "content"
 
 PB_BASE = "http://100.117.43.98:8090"   # <-- tu server
 ADMIN_EMAIL = "jmfinella@gmail.com"        # <-- admin del panel
@@ -13,17 +39,45 @@ def die(msg):
     print(msg)
     sys.exit(1)
 
+def _ok(r):
+    # requests tiene .ok, httpx no: chequeo de status portable entre ambos
+    return 200 <= r.status_code < 300
+
+def _make_session():
+    if httpx is not None:
+        try:
+            return httpx.Client(http2=True, timeout=20)
+        except ImportError:  # httpx sin el extra h2
+            return httpx.Client(timeout=20)
+    s = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=2,
+        pool_maxsize=8,
+        max_retries=Retry(total=2, backoff_factor=0.2),
+    )
+    s.mount("http://", adapter)
+    s.mount("https://", adapter)
+    return s
+
 class PBAdmin:
     def __init__(self, base):
         self.base = base.rstrip('/')
-        self.s = requests.Session()
+        self.s = _make_session()
+        # bodies pre-serializados con _dumps: el header va una sola vez
+        self.s.headers.update({"Content-Type": "application/json"})
+
+    def _post_json(self, url, payload, timeout):
+        return self.s.post(url, timeout=timeout, **{_BODY_KW: _dumps(payload)})
+
+    def _patch_json(self, url, payload, timeout):
+        return self.s.patch(url, timeout=timeout, **{_BODY_KW: _dumps(payload)})
 
     def admin_login(self, email, password):
-        r = self.s.post(f"{self.base}/api/admins/auth-with-password", json={
+        r = self._post_json(f"{self.base}/api/admins/auth-with-password", {
             "identity": email,
             "password": password
         }, timeout=15)
-        if not r.ok:
+        if not _ok(r):
             die(f"[LOGIN] {r.status_code}: {r.text}")
         tok = r.json().get("token")
         if not tok:
@@ -35,19 +89,19 @@ class PBAdmin:
         r = self.s.get(f"{self.base}/api/collections/{name_or_id}", timeout=15)
         if r.status_code == 404:
             return None
-        if not r.ok:
+        if not _ok(r):
             die(f"[GET {name_or_id}] {r.status_code}: {r.text}")
         return r.json()
 
     def create_collection(self, payload):
-        r = self.s.post(f"{self.base}/api/collections", json=payload, timeout=20)
-        if not r.ok:
+        r = self._post_json(f"{self.base}/api/collections", payload, timeout=20)
+        if not _ok(r):
             die(f"[CREATE {payload.get('name')}] {r.status_code}: {r.text}")
         return r.json()
 
     def update_collection(self, id_or_name, payload):
-        r = self.s.patch(f"{self.base}/api/collections/{id_or_name}", json=payload, timeout=20)
-        if not r.ok:
+        r = self._patch_json(f"{self.base}/api/collections/{id_or_name}", payload, timeout=20)
+        if not _ok(r):
             die(f"[UPDATE {id_or_name}] {r.status_code}: {r.text}")
         return r.json()
 
@@ -140,6 +194,22 @@ def spec_tasks(contexts_id: str, tasks_id: str | None = None):
     }
 
 
+def _strip_volatile(value):
+    """Quita claves que el server agrega solo (id/created/updated/system)
+    para poder comparar una spec local contra la colección devuelta."""
+    if isinstance(value, dict):
+        return {k: _strip_volatile(v) for k, v in value.items()
+                if k not in ("id", "created", "updated", "system")}
+    if isinstance(value, list):
+        return [_strip_volatile(v) for v in value]
+    return value
+
+
+def _spec_digest(spec: dict) -> str:
+    canon = json.dumps(_strip_volatile(spec), sort_keys=True, separators=(",", ":"))
+    return hashlib.blake2b(canon.encode(), digest_size=16).hexdigest()
+
+
 def upsert_collection(pb: PBAdmin, spec: dict):
     existing = pb.get_collection(spec["name"])
     if not existing:
@@ -149,6 +219,13 @@ def upsert_collection(pb: PBAdmin, spec: dict):
     spec_with_id_name = spec.copy()
     spec_with_id_name["id"] = cid
     spec_with_id_name["name"] = existing["name"]
+    # PATCH solo si la spec difiere: en el caso común (re-correr el bootstrap
+    # sin cambios de schema) comparamos hashes y nos ahorramos la migración
+    comparable = {k: existing.get(k) for k in spec_with_id_name if k != "id"}
+    if _spec_digest(comparable) == _spec_digest(
+            {k: v for k, v in spec_with_id_name.items() if k != "id"}):
+        print(f"[SKIP] {existing['name']} sin cambios")
+        return existing
     return pb.update_collection(cid, spec_with_id_name)
 
 
@@ -156,13 +233,15 @@ def main():
     pb = PBAdmin(PB_BASE)
     pb.admin_login(ADMIN_EMAIL, ADMIN_PASSWORD)
 
-    # 1) contexts
-    ctx = upsert_collection(pb, spec_contexts())
+    # 1+2) contexts y journal_pages no dependen entre sí: en paralelo.
+    # tasks sí necesita el id de contexts, así que queda secuencial abajo.
+    with ThreadPoolExecutor(max_workers=2) as ex:
+        fut_ctx = ex.submit(upsert_collection, pb, spec_contexts())
+        fut_jp = ex.submit(upsert_collection, pb, spec_journal_pages())
+        ctx = fut_ctx.result()
+        jp = fut_jp.result()
     contexts_id = ctx.get("id")
     print("OK: contexts", contexts_id)
-
-    # 2) journal_pages
-    jp = upsert_collection(pb, spec_journal_pages())
     print("OK: journal_pages", jp.get("id"))
 
     # 3) tasks (fase 1 sin self‑relation)
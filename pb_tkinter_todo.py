@@ -30,19 +30,50 @@ import uuid
 import requests
 import datetime as dt
 import threading
+import queue
+import random
 import json as _json
+from concurrent.futures import ThreadPoolExecutor
 try:
     from websocket import WebSocketApp
 except Exception:
     WebSocketApp = None  # si falta la lib, la app sigue con pull cada X seg
 
+# orjson si está instalado (3-5x más rápido parseando las listas del sync);
+# si no, el json de stdlib — mismo guard opcional que para websocket
+try:
+    import orjson as _fastjson
+
+    def _loads(raw):
+        return _fastjson.loads(raw)
+except ImportError:
+    def _loads(raw):
+        return _json.loads(raw)
+
 # ===================== CONFIG =====================
 BASE_URL = "http://100.117.43.98:8090/"  # PocketBase serve address
 EMAIL = "jmfinella@gmail.com"      
 PASSWORD = "adminadmin"
-USER = "jmfinella"             
+USER = "jmfinella"
 SYNC_INTERVAL_MS = 60_000  # 60s; el realtime hará la mayor parte
 
+# pool para el I/O de red: los GET de cada pestaña salen en paralelo y la UI
+# nunca bloquea esperando a PocketBase; los resultados vuelven vía after(0)
+_EXEC = ThreadPoolExecutor(max_workers=8)
+
+# timeouts (connect, read): conectar a un server caído falla en 3 s en vez de
+# colgar 10-15 s el worker; el read mantiene margen para las respuestas gordas
+_TIMEOUT = (3.0, 10.0)
+_TIMEOUT_LONG = (3.0, 15.0)
+
+def _retrying_adapter() -> requests.adapters.HTTPAdapter:
+    """Adapter keep-alive con reintentos cortos para errores transitorios."""
+    retry = requests.adapters.Retry(
+        total=2, connect=2, backoff_factor=0.3,
+        status_forcelist=[502, 503, 504])
+    return requests.adapters.HTTPAdapter(
+        pool_connections=16, pool_maxsize=32, max_retries=retry)
+
 # ============== PocketBase client (simple) ===============
 class PBError(Exception):
     pass
@@ -53,14 +84,23 @@ class PocketBaseClient:
         self.token: str | None = None
         self.user_id: str | None = None
         self.session = requests.Session()
+        # pool dimensionado para los fetches paralelos de _EXEC: sin esto el
+        # adapter default (10) descarta conexiones keep-alive bajo carga y
+        # cada GET extra paga handshake TCP de nuevo
+        adapter = _retrying_adapter()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        # ensure_context se llama con los mismos nombres en cada arranque:
+        # memo por nombre para no repetir el GET de búsqueda
+        self._ctx_by_name: dict[str, dict] = {}
 
     # ---------- auth ----------
     def login(self, email: str, password: str):
         url = f"{self.base_url}/api/collections/users/auth-with-password"
-        r = self.session.post(url, json={"identity": email, "password": password}, timeout=10)
+        r = self.session.post(url, json={"identity": email, "password": password}, timeout=_TIMEOUT)
         if not r.ok:
             raise PBError(f"Login failed: {r.status_code} {r.text}")
-        data = r.json()
+        data = _loads(r.content)
         self.token = data.get("token")
         self.user_id = data.get("record", {}).get("id")
         if not self.token or not self.user_id:
@@ -70,37 +110,113 @@ class PocketBaseClient:
     # ---------- contexts ----------
     def list_contexts(self) -> list[dict]:
         url = f"{self.base_url}/api/collections/contexts/records"
-        r = self.session.get(url, params={"filter": f'owner = "{self.user_id}"', "perPage": 200}, timeout=10)
+        # skipTotal: PocketBase se ahorra el COUNT(*) que acompaña a cada
+        # respuesta paginada y que acá nadie mira
+        r = self.session.get(url, params={"filter": f'owner = "{self.user_id}"', "perPage": 200,
+                                          "fields": "id,name,color", "skipTotal": "true"}, timeout=_TIMEOUT)
         if not r.ok:
             raise PBError(r.text)
-        return r.json().get("items", [])
+        return _loads(r.content).get("items", [])
 
     def ensure_context(self, name: str, color: str | None = None) -> dict:
+        cached = self._ctx_by_name.get(name)
+        if cached is not None:
+            return cached
         # get by name
         url = f"{self.base_url}/api/collections/contexts/records"
-        r = self.session.get(url, params={"filter": f'name = "{name}" && owner = "{self.user_id}"', "perPage": 1}, timeout=10)
-        if r.ok and r.json().get("items"):
-            return r.json()["items"][0]
+        r = self.session.get(url, params={"filter": f'name = "{name}" && owner = "{self.user_id}"', "perPage": 1,
+                                          "fields": "id,name,color", "skipTotal": "true"}, timeout=_TIMEOUT)
+        if r.ok:
+            items = _loads(r.content).get("items")
+            if items:
+                ctx = items[0]
+                self._ctx_by_name[name] = ctx
+                return ctx
         # create
         url = f"{self.base_url}/api/collections/contexts/records"
         payload = {"name": name, "owner": self.user_id}
         if color:
             payload["color"] = color
-        r = self.session.post(url, json=payload, timeout=10)
+        r = self.session.post(url, json=payload, timeout=_TIMEOUT)
         if not r.ok:
             raise PBError(r.text)
-        return r.json()
+        ctx = _loads(r.content)
+        self._ctx_by_name[name] = ctx
+        return ctx
 
     # ---------- tasks ----------
-    def list_tasks(self, context_id: str, status: str = "open") -> list[dict]:
+    def list_tasks(self, context_id: str, status: str = "open",
+                   after: tuple[float, str] | None = None, limit: int = 100) -> list[dict]:
+        """Una página keyset: ordena por (position, id) y corta en `limit`.
+
+        `after` es el cursor compuesto (position, id) del último record de
+        la página anterior: el server hace un seek sobre el índice en lugar
+        de contar/saltear N*100 filas (OFFSET). El desempate por id es lo
+        que hace estable al cursor: position NO es única (las rutinas
+        materializadas nacen todas con position=1.0), y un `position > X`
+        a secas salteaba los empates que cruzaban el corte de página.
+        """
         url = f"{self.base_url}/api/collections/tasks/records"
         filt = f'owner = "{self.user_id}" && context = "{context_id}"'
         if status:
             filt += f' && status = "{status}"'
-        r = self.session.get(url, params={"filter": filt, "sort": "position,-priority,created", "perPage": 500}, timeout=10)
+        if after is not None:
+            pos, last_id = after
+            filt += f' && (position > {pos} || (position = {pos} && id > "{last_id}"))'
+        # proyección: la UI solo usa estos campos; sin fields= el server
+        # serializa (y nosotros parseamos) notes, recurrence, timestamps, etc.
+        r = self.session.get(url, params={"filter": filt, "sort": "position,id", "perPage": limit,
+                                          "fields": "id,title,status,priority,position,context,due_date",
+                                          "skipTotal": "true"}, timeout=_TIMEOUT)
         if not r.ok:
             raise PBError(r.text)
-        return r.json().get("items", [])
+        return _loads(r.content).get("items", [])
+
+    def list_tasks_all(self, context_id: str, status: str = "open") -> list[dict]:
+        """Agota la paginación keyset (páginas de 100) y devuelve todo."""
+        items: list[dict] = []
+        after = None
+        while True:
+            page = self.list_tasks(context_id, status=status, after=after)
+            items.extend(page)
+            if len(page) < 100:
+                return items
+            after = (page[-1].get("position"), page[-1].get("id"))
+
+    def list_open_tasks_by_contexts(self, ctx_ids: list[str],
+                                    updated_after: str | None = None) -> list[dict]:
+        """Las tareas open de TODOS los contextos en una sola query (OR).
+
+        Paginación por page= y no keyset: position no es única entre
+        contextos distintos, así que acá no sirve como cursor.
+
+        Con `updated_after` devuelve solo lo tocado después de ese timestamp
+        y SIN restringir status: un toggle a done tiene que llegar para poder
+        sacar la fila de la lista.
+        """
+        if not ctx_ids:
+            return []
+        ors = " || ".join(f'context = "{cid}"' for cid in ctx_ids)
+        filt = f'owner = "{self.user_id}" && ({ors})'
+        if updated_after:
+            filt += f' && updated > "{updated_after}"'
+        else:
+            filt += ' && status = "open"'
+        url = f"{self.base_url}/api/collections/tasks/records"
+        items: list[dict] = []
+        page = 1
+        while True:
+            r = self.session.get(url, params={"filter": filt, "sort": "position,-priority,created",
+                                              "perPage": 200, "page": page,
+                                              "fields": "id,title,status,priority,position,context,due_date,updated",
+                                              "skipTotal": "true"}, timeout=_TIMEOUT)
+            if not r.ok:
+                raise PBError(r.text)
+            batch = _loads(r.content).get("items", [])
+            items.extend(batch)
+            if len(batch) < 200:
+                return items
+            page += 1
 
     def create_task(self, title: str, context_id: str, position: float = 1.0, priority: int = 0,
         kind: str = "todo", journal_date: str | None = None) -> dict:
@@ -117,17 +233,26 @@ class PocketBaseClient:
         "owner": self.user_id,
         "journal_date": journal_date
         }
-        r = self.session.post(url, json=payload, timeout=10)
+        r = self.session.post(url, json=payload, timeout=_TIMEOUT)
         if not r.ok:
             raise PBError(f"Create task failed: {r.status_code} {r.text}")
-        return r.json()
+        return _loads(r.content)
 
     def patch_task(self, task_id: str, **fields) -> dict:
         url = f"{self.base_url}/api/collections/tasks/records/{task_id}"
-        r = self.session.patch(url, json=fields, timeout=10)
+        r = self.session.patch(url, json=fields, timeout=_TIMEOUT)
         if not r.ok:
             raise PBError(r.text)
-        return r.json()
+        return _loads(r.content)
+
+    def batch(self, ops: list[dict]) -> list[dict]:
+        """Varias operaciones de escritura en un solo request (/api/batch)."""
+        if not ops:
+            return []
+        r = self.session.post(f"{self.base_url}/api/batch", json={"requests": ops}, timeout=_TIMEOUT_LONG)
+        if not r.ok:
+            raise PBError(f"Batch failed: {r.status_code} {r.text}")
+        return [res.get("body") for res in _loads(r.content)]
 
 # ================== Tkinter UI ==================
 class ToDoApp(tk.Tk):
@@ -150,10 +275,23 @@ class ToDoApp(tk.Tk):
         # Notebook (tabs per context)
         self.nb = ttk.Notebook(self)
         self.nb.pack(fill="both", expand=True)
-        self._rt_lock = threading.Lock()
-        self._rt_pending = False
+        # el hilo del WS solo encola acá; el hilo de Tk drena con un after()
+        # periódico. Nada de locks ni de llamar after() desde otro hilo.
+        self._rt_queue: queue.Queue = queue.Queue()
+        self._rt_after_id = None
+        # errores de callbacks asíncronos: se encolan y un tick periódico los
+        # coalescea en UN diálogo (una ráfaga de fallas no apila modales)
+        self._error_queue: queue.Queue = queue.Queue()
+        self.after(500, self._drain_errors)
+        # timestamp monotónico del último mensaje del WS: mientras el canal
+        # esté fresco, el poll de _auto_sync es redundante y se saltea
+        self._last_ws_msg = 0.0
+        self._stopping = False  # frena el loop de reconexión del WS al cerrar
+        self._last_updated: str | None = None
+        self._sync_count = 0
         #self._load_contexts_build_tabs()
         self._start_realtime()   # <- inicia realtime
+        self.after(100, self._drain_rt_queue)
         self.context_tabs: dict[str, ContextTab] = {}
 
         self.bind("<F5>", lambda e: self.sync_all())
@@ -165,7 +303,8 @@ class ToDoApp(tk.Tk):
     def prepare_day(self):
         """Ejecuta el rollover + materialización de rutinas para HOY (usuario actual)."""
         try:
-            DailyOps(BASE_URL, self.client.token, self.client.user_id).prepare_today()
+            DailyOps(BASE_URL, self.client.token, self.client.user_id,
+                     session=self.client.session).prepare_today()
             self.sync_all()
             self.status_var.set("Día preparado ✓")
         except Exception as e:
@@ -182,91 +321,301 @@ class ToDoApp(tk.Tk):
         ws_url = base.replace('https://', 'wss://').replace('http://', 'ws://') + "/api/realtime"
         headers = [f"Authorization: Bearer {self.client.token}"]
 
+        opened = False
+
         def on_open(ws):
+            nonlocal opened
+            opened = True
             sub = {"id": "sub_tasks", "type": "subscribe", "collection": "tasks",
                 "filter": f'owner = "{self.client.user_id}"'}
             ws.send(_json.dumps(sub))
+            self._last_ws_msg = time.monotonic()
             print("[realtime] suscripto OK")
 
         def on_message(ws, message):
-            if not self.winfo_exists():
-                return
-            with self._rt_lock:
-                if not self._rt_pending:
-                    self._rt_pending = True
-                    try:
-                        self.after(300, self._rt_apply)
-                    except tk.TclError:
-                        pass
+            # hilo del WS: parsear y encolar, nada de Tk acá
+            self._last_ws_msg = time.monotonic()
+            try:
+                msg = _loads(message)
+            except Exception:
+                msg = None
+            payload = (msg or {}).get("data") or msg or {}
+            action = payload.get("action")
+            record = payload.get("record")
+            if action and isinstance(record, dict) and record.get("id"):
+                self._rt_queue.put((action, record))
+            else:
+                # mensaje sin record utilizable (p.ej. el OK de suscripción):
+                # sentinela que pide un full sync debounced
+                self._rt_queue.put(None)
 
         def on_error(ws, error):
-            print("[realtime] deshabilitado (", error, "); continúo con pull cada", SYNC_INTERVAL_MS, "ms")
+            print("[realtime] error (", error, "); reintento con backoff, pull sigue de red de seguridad")
+
+        def run():
+            # reconexión con backoff exponencial jittereado 1 -> 30 s: una
+            # caída del server no deja la app muda hasta reiniciarla, y el
+            # jitter evita que todos los clientes vuelvan a la vez
+            nonlocal opened
+            backoff = 1.0
+            while not self._stopping:
+                opened = False
+                try:
+                    self._ws = WebSocketApp(ws_url, header=headers,
+                                            on_open=on_open, on_message=on_message, on_error=on_error)
+                    # pings periódicos: detecta conexiones zombies detrás de NAT/proxy
+                    self._ws.run_forever(ping_interval=25, ping_timeout=10)
+                except Exception as e:
+                    print("[realtime] error al iniciar:", e)
+                if self._stopping:
+                    return
+                if opened:
+                    backoff = 1.0  # la conexión anduvo: el próximo intento es inmediato
+                delay = backoff + random.uniform(0, backoff / 2)
+                time.sleep(delay)
+                backoff = min(backoff * 2, 30.0)
+
+        threading.Thread(target=run, daemon=True).start()
 
+    def destroy(self):
+        self._stopping = True
+        ws = getattr(self, "_ws", None)
+        if ws is not None:
+            try:
+                ws.close()
+            except Exception:
+                pass
+        super().destroy()
+
+    def report_error(self, title: str, msg: str):
+        """Encola un error para mostrarlo coalesceado (seguro desde cualquier hilo)."""
+        self._error_queue.put((title, msg))
+
+    def _drain_errors(self):
+        errs = []
         try:
-            self._ws = WebSocketApp(ws_url, header=headers,
-                                    on_open=on_open, on_message=on_message, on_error=on_error)
-            threading.Thread(target=self._ws.run_forever, daemon=True).start()
-        except Exception as e:
-            print("[realtime] error al iniciar:", e, "; uso pull.")
+            while True:
+                errs.append(self._error_queue.get_nowait())
+        except queue.Empty:
+            pass
+        if errs:
+            title, msg = errs[-1]
+            if len(errs) > 1:
+                msg = f"{len(errs)} errores seguidos; último:\n{msg}"
+            self.status_var.set(f"⚠ {title}: {msg.splitlines()[-1][:80]}")
+            mb.showerror(title, msg)
+        if self.winfo_exists():
+            self.after(500, self._drain_errors)
+
+    def _drain_rt_queue(self):
+        """Loop en el hilo de Tk: vacía la cola del WS y aplica los eventos."""
+        try:
+            while True:
+                item = self._rt_queue.get_nowait()
+                if item is None:
+                    self._rt_schedule_sync()
+                    continue
+                action, record = item
+                tab = self.context_tabs.get(record.get("context"))
+                if tab is None:
+                    # contexto que todavía no tiene pestaña: vale un sync
+                    self._rt_schedule_sync()
+                else:
+                    tab.apply_event(action, record)
+        except queue.Empty:
+            pass
+        if self.winfo_exists():
+            self.after(100, self._drain_rt_queue)
+
+    def _rt_schedule_sync(self):
+        # debounce con cola (trailing): cada llamada resetea el timer, así
+        # una ráfaga dispara UN solo sync 250 ms después del último evento.
+        # Siempre corre en el hilo de Tk, así que no necesita lock.
+        if self._rt_after_id is not None:
+            self.after_cancel(self._rt_after_id)
+        self._rt_after_id = self.after(250, self._rt_apply)
 
     def _rt_apply(self):
         if not self.winfo_exists():
             return
-        with self._rt_lock:
-            self._rt_pending = False
+        self._rt_after_id = None
         self.sync_all()
     # ---------- contexts init ----------
     def _load_contexts_build_tabs(self):
+        # el GET inicial corre en el pool: la ventana aparece de inmediato y
+        # las pestañas se arman cuando llega la respuesta
+        fut = _EXEC.submit(self.client.list_contexts)
+        fut.add_done_callback(lambda f: self.after(0, self._on_contexts_loaded, f))
+
+    def _bootstrap_default_contexts(self) -> list[dict]:
+        """Primer arranque: crea los dos contextos default EN PARALELO.
+
+        ensure_context ya devuelve la fila creada, así que no hace falta
+        un list_contexts extra: 3 round-trips seriales pasan a ~1.
+        """
+        f1 = _EXEC.submit(self.client.ensure_context, "Laboral", "#2E86DE")
+        f2 = _EXEC.submit(self.client.ensure_context, "Personal", "#27AE60")
+        return [f1.result(), f2.result()]
+
+    def _on_contexts_loaded(self, fut, bootstrapped: bool = False):
+        if not self.winfo_exists():
+            return
         try:
-            contexts = self.client.list_contexts()
-            # Bootstrap: create default ones if empty
-            if not contexts:
-                self.client.ensure_context("Laboral", "#2E86DE")
-                self.client.ensure_context("Personal", "#27AE60")
-                contexts = self.client.list_contexts()
-            # Build tabs
-            for c in contexts:
-                if c["id"] not in self.context_tabs:
-                    tab = ContextTab(self.nb, self.client, c)
-                    self.nb.add(tab, text=c.get("name", "Context"))
-                    self.context_tabs[c["id"]] = tab
-            self.sync_all()
+            contexts = fut.result()
         except Exception as e:
-            mb.showerror("Error", f"No se pudieron cargar contextos:\n{e}")
+            self.report_error("Error", f"No se pudieron cargar contextos:\n{e}")
             print(f"No se pudieron cargar contextos:\n{e}")
+            return
+        if not contexts and not bootstrapped:
+            fut2 = _EXEC.submit(self._bootstrap_default_contexts)
+            fut2.add_done_callback(
+                lambda f: self.after(0, self._on_contexts_loaded, f, True))
+            return
+        # Build tabs (hilo de Tk)
+        for c in contexts:
+            if c["id"] not in self.context_tabs:
+                tab = ContextTab(self.nb, self.client, c)
+                self.nb.add(tab, text=c.get("name", "Context"))
+                self.context_tabs[c["id"]] = tab
+        self.sync_all()
 
     # ---------- sync ----------
-    def sync_all(self):
+    def sync_all(self, full: bool = False):
+        """Un solo GET (filtro OR sobre todos los contextos) en el pool;
+        el resultado se parte por contexto y cada tree se actualiza en Tk.
+
+        En régimen pide solo `updated > ultimo visto` (respuesta vacía en el
+        caso típico de que no cambió nada); cada N ciclos o con full=True
+        baja la lista completa para enterarse de los deletes."""
+        if not self.context_tabs:
+            return
+        ids = list(self.context_tabs.keys())
+        self._sync_count += 1
+        updated_after = None
+        if not full and self._last_updated and self._sync_count % 10 != 0:
+            updated_after = self._last_updated
+        fut = _EXEC.submit(self.client.list_open_tasks_by_contexts, ids, updated_after)
+        fut.add_done_callback(
+            lambda f: self.after(0, self._on_sync_all, f, updated_after is not None))
+
+    def _on_sync_all(self, fut, incremental: bool):
+        if not self.winfo_exists():
+            return
+        try:
+            items = fut.result()
+        except Exception as e:
+            print("Sync error:", e)
+            return
+        for t in items:
+            u = t.get("updated")
+            if u and (self._last_updated is None or u > self._last_updated):
+                self._last_updated = u
+        if incremental:
+            # delta: cada record va directo a la fila de su pestaña
+            for t in items:
+                tab = self.context_tabs.get(t.get("context"))
+                if tab is not None:
+                    tab.apply_event("update", t)
+            if items:
+                self.status_var.set(
+                    f"Sincronizado {time.strftime('%H:%M:%S')} · {len(items)} cambios")
+            return
+        buckets: dict[str, list[dict]] = {cid: [] for cid in self.context_tabs}
+        for t in items:
+            b = buckets.get(t.get("context"))
+            if b is not None:
+                b.append(t)
         changed = 0
-        for tab in self.context_tabs.values():
-            changed += tab.refresh_tasks()
+        for cid, tab in self.context_tabs.items():
+            changed += tab._apply_items(buckets[cid])
         self.status_var.set(f"Sincronizado {time.strftime('%H:%M:%S')} · {changed} items")
 
+    def _ws_healthy(self) -> bool:
+        """True si el WS dio señales de vida hace menos de 1.5 intervalos."""
+        return (time.monotonic() - self._last_ws_msg) < (SYNC_INTERVAL_MS / 1000.0) * 1.5
+
     def _auto_sync(self):
         try:
-            self.sync_all()
+            # con realtime fresco los cambios ya llegaron por el WS: el poll
+            # periódico solo corre como red de seguridad cuando el canal
+            # está caído o silencioso demasiado tiempo
+            if not self._ws_healthy():
+                self.sync_all()
         finally:
             self.after(SYNC_INTERVAL_MS, self._auto_sync)
 
+# cache de RRULEs parseadas, clave (id, updated): el string no cambia entre
+# días, así que el split/upper se paga una sola vez por edición de la rutina.
+# A nivel módulo porque DailyOps se instancia en cada "Preparar día".
+_RRULE_CACHE: dict[tuple, dict] = {}
+
+def _parse_rrule(rrule: str) -> dict:
+    """FREQ y BYDAY de una RRULE simple -> {"freq": str|None, "byday": frozenset}."""
+    freq = None
+    byday: frozenset = frozenset()
+    for part in (rrule or "").upper().split(";"):
+        if part.startswith("FREQ="):
+            freq = part[5:]
+        elif part.startswith("BYDAY="):
+            byday = frozenset(p.strip() for p in part[6:].split(",") if p.strip())
+    return {"freq": freq, "byday": byday}
+
+
 class DailyOps:
-    def __init__(self, base_url: str, user_token, user_id):
+    def __init__(self, base_url: str, user_token, user_id, session=None):
         self.base = base_url.rstrip('/')
-        import requests as _rq
-        self.s = _rq.Session()
-        self.s.headers.update({"Authorization": f"Bearer {user_token}"})
+        if session is not None:
+            # pool compartido con el cliente principal: mismas conexiones
+            # keep-alive ya autenticadas, cero handshakes extra
+            self.s = session
+        else:
+            import requests as _rq
+            self.s = _rq.Session()
+            adapter = _retrying_adapter()
+            self.s.mount("http://", adapter)
+            self.s.mount("https://", adapter)
+            self.s.headers.update({"Authorization": f"Bearer {user_token}"})
         self.user_id = user_id
 
+    # /api/batch rechaza lotes de más de 50 operaciones (límite por defecto
+    # de PocketBase) y es transaccional: un lote grande fallaba entero
+    _BATCH_MAX = 50
+
+    def _batch(self, ops: list[dict]) -> list[dict]:
+        """Las escrituras acumuladas salen a /api/batch en lotes de hasta 50 ops."""
+        results: list[dict] = []
+        for i in range(0, len(ops), self._BATCH_MAX):
+            chunk = ops[i:i + self._BATCH_MAX]
+            try:
+                r = self.s.post(f"{self.base}/api/batch", json={"requests": chunk}, timeout=_TIMEOUT_LONG)
+                r.raise_for_status()
+            except Exception:
+                # batch deshabilitado o rechazando el lote: degradamos a
+                # escrituras individuales antes que perder el prepare_today
+                results.extend(self._singles(chunk))
+                continue
+            results.extend(res.get("body") for res in _loads(r.content))
+        return results
+
+    def _singles(self, ops: list[dict]) -> list[dict]:
+        out: list[dict] = []
+        for op in ops:
+            r = self.s.request(op["method"], f"{self.base}{op['url']}", json=op.get("body"), timeout=_TIMEOUT)
+            r.raise_for_status()
+            out.append(_loads(r.content) if r.content else {})
+        return out
+
     def _ensure_page(self, date_iso: str) -> dict:
         r = self.s.get(f"{self.base}/api/collections/journal_pages/records",
-                    params={"filter": f'owner = "{self.user_id}" && date = "{date_iso}"', "perPage": 1}, timeout=10)
+                    params={"filter": f'owner = "{self.user_id}" && date = "{date_iso}"', "perPage": 1}, timeout=_TIMEOUT)
         r.raise_for_status()
-        items = r.json().get("items", [])
+        items = _loads(r.content).get("items", [])
         if items:
             return items[0]
         r = self.s.post(f"{self.base}/api/collections/journal_pages/records",
-                        json={"date": date_iso, "owner": self.user_id}, timeout=10)
+                        json={"date": date_iso, "owner": self.user_id}, timeout=_TIMEOUT)
         r.raise_for_status()
-        return r.json()
+        return _loads(r.content)
 
     def prepare_today(self, today: dt.date | None = None):
         if today is None:
@@ -278,40 +627,51 @@ class DailyOps:
         # 1) asegurar página de hoy
         self._ensure_page(today_iso)
 
+        # las escrituras (PATCH de migración, POST de rutinas, PATCH de
+        # eventos) se acumulan acá y salen en un único batch transaccional
+        ops: list[dict] = []
+
         # 2) mover tareas 'open' de ayer a hoy (solo kind=todo)
         r = self.s.get(f"{self.base}/api/collections/tasks/records",
                     params={"filter": f'owner = "{self.user_id}" && status = "open" && journal_date = "{y_iso}" && kind = "todo"',
-                            "perPage": 500}, timeout=15)
+                            "perPage": 500, "fields": "id,migrated_count"}, timeout=_TIMEOUT_LONG)
         r.raise_for_status()
-        for t in r.json().get("items", []):
+        for t in _loads(r.content).get("items", []):
             migrated = (t.get("migrated_count") or 0) + 1
-            self.s.patch(f"{self.base}/api/collections/tasks/records/{t['id']}",
-                        json={"journal_date": today_iso, "migrated_count": migrated}, timeout=10).raise_for_status()
+            ops.append({
+                "method": "PATCH",
+                "url": f"/api/collections/tasks/records/{t['id']}",
+                "body": {"journal_date": today_iso, "migrated_count": migrated},
+            })
 
         # 3) materializar rutinas semanales (FREQ=WEEKLY;BYDAY=...)
         weekday_map = ["MO", "TU", "WE", "TH", "FR", "SA", "SU"]
         today_token = weekday_map[today.weekday()]
         r = self.s.get(f"{self.base}/api/collections/tasks/records",
                     params={"filter": f'owner = "{self.user_id}" && kind = "routine" && recurrence != ""',
-                            "perPage": 500}, timeout=15)
+                            "perPage": 500,
+                            "fields": "id,title,notes,priority,context,recurrence,updated"}, timeout=_TIMEOUT_LONG)
+        r.raise_for_status()
+        routines = _loads(r.content).get("items", [])
+        # instancias ya materializadas hoy, en UN solo GET: el chequeo de
+        # duplicados por rutina pasa a ser un lookup en memoria (antes era
+        # un round-trip por cada rutina, incluso las que no tocaban hoy)
+        r = self.s.get(f"{self.base}/api/collections/tasks/records",
+                    params={"filter": f'owner = "{self.user_id}" && journal_date = "{today_iso}" && parent_task != ""',
+                            "perPage": 500, "fields": "parent_task"}, timeout=_TIMEOUT_LONG)
         r.raise_for_status()
-        routines = r.json().get("items", [])
+        materialized = {c.get("parent_task") for c in _loads(r.content).get("items", [])}
         for rt in routines:
-            rrule = (rt.get("recurrence") or "").upper()
-            if "FREQ=WEEKLY" not in rrule:
+            key = (rt["id"], rt.get("updated"))
+            parsed = _RRULE_CACHE.get(key)
+            if parsed is None:
+                parsed = _RRULE_CACHE[key] = _parse_rrule(rt.get("recurrence"))
+            if parsed["freq"] != "WEEKLY":
                 continue
-            byday = []
-            for part in rrule.split(";"):
-                if part.startswith("BYDAY="):
-                    byday = [p.strip() for p in part.replace("BYDAY=", "").split(",") if p.strip()]
-            if byday and today_token not in byday:
+            if parsed["byday"] and today_token not in parsed["byday"]:
                 continue
-            # evitar duplicados de hoy
-            chk = self.s.get(f"{self.base}/api/collections/tasks/records",
-                            params={"filter": f'owner = "{self.user_id}" && parent_task = "{rt["id"]}" && journal_date = "{today_iso}"',
-                                    "perPage": 1}, timeout=10)
-            chk.raise_for_status()
-            if chk.json().get("items"):
+            # evitar duplicados de hoy (contra el set prefetcheado)
+            if rt["id"] in materialized:
                 continue
             # crear instancia hija
             payload = {
@@ -326,17 +686,24 @@ class DailyOps:
                 "journal_date": today_iso,
                 "parent_task": rt.get("id")
             }
-            self.s.post(f"{self.base}/api/collections/tasks/records", json=payload, timeout=10).raise_for_status()
+            ops.append({"method": "POST", "url": "/api/collections/tasks/records", "body": payload})
 
         # 4) eventos del día: asegurar que se vean en la página de hoy
         evf = (f'owner = "{self.user_id}" && kind = "event" '
             f'&& start_at >= "{today_iso} 00:00:00Z" && start_at < "{today_iso} 23:59:59Z"')
-        r = self.s.get(f"{self.base}/api/collections/tasks/records", params={"filter": evf, "perPage": 500}, timeout=15)
+        r = self.s.get(f"{self.base}/api/collections/tasks/records",
+                    params={"filter": evf, "perPage": 500, "fields": "id,journal_date"}, timeout=_TIMEOUT_LONG)
         r.raise_for_status()
-        for ev in r.json().get("items", []):
+        for ev in _loads(r.content).get("items", []):
             if ev.get("journal_date") != today_iso:
-                self.s.patch(f"{self.base}/api/collections/tasks/records/{ev["id"]}",
-                            json={"journal_date": today_iso}, timeout=10).raise_for_status()
+                ops.append({
+                    "method": "PATCH",
+                    "url": f"/api/collections/tasks/records/{ev['id']}",
+                    "body": {"journal_date": today_iso},
+                })
+
+        # 5) un solo round-trip para todos los PATCH/POST del día
+        self._batch(ops)
 class ContextTab(ttk.Frame):
     def __init__(self, parent, client: PocketBaseClient, context: dict):
         super().__init__(parent)
@@ -373,41 +740,110 @@ class ContextTab(ttk.Frame):
 
         # local cache {item_id: task_dict}
         self.cache: dict[str, dict] = {}
+        # último (values, tags) efectivamente puesto en el tree por fila:
+        # si no cambió, ni siquiera llamamos a tree.item (cada llamada cruza
+        # a Tcl aunque configure lo mismo)
+        self._rendered: dict[str, tuple] = {}
+        # máxima position conocida, mantenida en los upserts: _on_add no
+        # tiene que recorrer todo el cache para ubicar el final de la lista.
+        # Monótona a propósito: borrar la última tarea deja un hueco, no rompe orden.
+        self._max_pos = 0.0
+        # snapshot pendiente de render: varias aplicaciones seguidas (sync +
+        # ráfaga de eventos) colapsan en un solo diff, aplicado en idle
+        self._pending_items: list[dict] | None = None
+        self._render_after = None
+        # toggles pendientes {iid: estado deseado}: una ráfaga de Space se
+        # debouncea y solo se PATCHea el estado NETO (doble toggle = 0 PATCH)
+        self._pending_toggles: dict[str, str] = {}
+        self._toggle_after = None
+
+    def _report_error(self, title: str, msg: str):
+        """Delega en la cola de errores de la app (coalescea ráfagas)."""
+        app = self.winfo_toplevel()
+        if hasattr(app, "report_error"):
+            app.report_error(title, msg)
+        else:
+            mb.showerror(title, msg)
 
     # ---------- actions ----------
+    # las mutaciones arman el payload en el hilo de Tk, mandan el HTTP al
+    # executor y aplican el resultado de vuelta con after(0): el doble-click
+    # o el Enter nunca congelan la ventana esperando a PocketBase
     def _on_add(self, event=None):
         title = self.entry.get().strip()
         if not title:
             return
+        pos = self._max_pos + 1.0  # O(1): el máximo se mantiene en los upserts
+        self.entry.delete(0, tk.END)  # optimista; se restaura si falla
+        fut = _EXEC.submit(self.client.create_task, title=title,
+                           context_id=self.context_id, position=pos)
+        fut.add_done_callback(lambda f: self.after(0, self._on_add_done, f, title))
+
+    def _on_add_done(self, fut, title: str):
+        if not self.winfo_exists():
+            return
         try:
-            # naive position: biggest + 1
-            pos = 1.0
-            if self.cache:
-                pos = max((t.get("position") or 1.0) for t in self.cache.values()) + 1.0
-            t = self.client.create_task(title=title, context_id=self.context_id, position=pos)
-            self.entry.delete(0, tk.END)
-            self._upsert_task(t)
+            t = fut.result()
         except Exception as e:
-            mb.showerror("Error", f"No se pudo crear la tarea:\n{e}")
+            self.entry.insert(0, title)
+            self._report_error("Error", f"No se pudo crear la tarea:\n{e}")
+            return
+        self.apply_event("create", t)
 
     def _toggle_done_event(self, event=None):
         sel = self.tree.selection()
         if not sel:
             return
-        iid = sel[0]
-        task = self.cache.get(iid)
-        if not task:
+        # cada pulsación solo invierte la intención pendiente; el PATCH sale
+        # recién 300 ms después de la última, con el estado neto
+        for iid in sel:
+            task = self.cache.get(iid)
+            if not task:
+                continue
+            cur = self._pending_toggles.get(iid, task.get("status"))
+            self._pending_toggles[iid] = "done" if cur != "done" else "open"
+        if self._toggle_after is not None:
+            self.after_cancel(self._toggle_after)
+        self._toggle_after = self.after(300, self._flush_toggles)
+
+    def _flush_toggles(self):
+        self._toggle_after = None
+        pending, self._pending_toggles = self._pending_toggles, {}
+        # neto == estado del server -> cero PATCH (doble Space se cancela solo)
+        changes = [(self.cache[iid]["id"], desired)
+                   for iid, desired in pending.items()
+                   if iid in self.cache and self.cache[iid].get("status") != desired]
+        if not changes:
+            return
+        if len(changes) == 1:
+            tid, st = changes[0]
+            fut = _EXEC.submit(lambda: [self.client.patch_task(tid, status=st)])
+        else:
+            # N filas -> 1 solo request batch
+            ops = [{
+                "method": "PATCH",
+                "url": f"/api/collections/tasks/records/{tid}",
+                "body": {"status": st},
+            } for tid, st in changes]
+            fut = _EXEC.submit(self.client.batch, ops)
+        fut.add_done_callback(lambda f: self.after(0, self._on_toggle_done, f))
+
+    def _on_toggle_done(self, fut):
+        if not self.winfo_exists():
             return
-        new_status = "done" if task.get("status") != "done" else "open"
         try:
-            t = self.client.patch_task(task["id"], status=new_status)
+            results = fut.result()
+        except Exception as e:
+            self._report_error("Error", f"No se pudo actualizar la tarea:\n{e}")
+            return
+        for t in results:
+            if not t:
+                continue
             # If done, remove from open list; if reopened, keep (since we show open-only)
             if t.get("status") == "open":
-                self._upsert_task(t)
+                self.apply_event("update", t)
             else:
-                self._remove_task(iid)
-        except Exception as e:
-            mb.showerror("Error", f"No se pudo actualizar la tarea:\n{e}")
+                self._remove_task(t["id"])
 
     def _archive_event(self, event=None):
         sel = self.tree.selection()
@@ -419,82 +855,160 @@ class ContextTab(ttk.Frame):
             return
         if not mb.askyesno("Archivar", f"¿Archivar la tarea?\n\n{task.get('title')}"):
             return
+        fut = _EXEC.submit(self.client.patch_task, task["id"], status="archived")
+        fut.add_done_callback(lambda f: self.after(0, self._on_archived, f, iid))
+
+    def _on_archived(self, fut, iid: str):
+        if not self.winfo_exists():
+            return
         try:
-            t = self.client.patch_task(task["id"], status="archived")
-            self._remove_task(iid)
+            fut.result()
         except Exception as e:
-            mb.showerror("Error", f"No se pudo archivar la tarea:\n{e}")
+            self._report_error("Error", f"No se pudo archivar la tarea:\n{e}")
+            return
+        self._remove_task(iid)
 
     # ---------- data/render ----------
     def tasks(self) -> int:
         """Pull open tasks and update tree. Returns number of items shown."""
         try:
-            items = self.client.list_tasks(self.context_id, status="open")
+            # paginación completa, como refresh_tasks: una sola página (100)
+            # haría que el diff borre del tree todo lo que quedó afuera
+            items = self._fetch_items()
         except Exception as e:
             # bubble up minimal; don't spam dialogs here (handled in parent)
             print("Sync error:", e)
             return len(self.cache)
-        # build by id for fast compare
-        by_id = {t["id"]: t for t in items}
-
-        # remove missing
-        to_remove = [iid for iid, t in self.cache.items() if t["id"] not in by_id]
-        for iid in to_remove:
-            self._remove_task(iid)
-
-        # upsert existing/new preserving row order according to items sequence
-        for t in items:
-            self._upsert_task(t)
-
-        # reorder tree to match returned order
-        order = []
-        for t in items:
-            iid = self._iid_for(t)
-            order.append(iid)
-        self.tree.delete(*self.tree.get_children(""))
-        for iid in order:
-            t = self.cache[iid]
-            self.tree.insert("", "end", iid=iid, values=(t.get("title"), t.get("priority", 0)))
-        return len(items)
+        # mismo diff incremental que el sync normal: nada de delete-all
+        return self._apply_items(items)
 
     def _iid_for(self, task: dict) -> str:
         return task.get("id") or str(uuid.uuid4())
 
-    def _upsert_task(self, task: dict):
+    def _upsert_task(self, task: dict, today_iso: str | None = None):
         iid = self._iid_for(task)
         self.cache[iid] = task
+        # vencida o no se decide UNA vez acá (las fechas ISO comparan
+        # lexicográficamente): el loop de render lee un bool, sin parsear
+        # fechas ni try/except por fila
+        if today_iso is None:
+            today_iso = dt.date.today().isoformat()
+        due = task.get("due_date") or ""
+        task["_overdue"] = bool(due) and due[:10] < today_iso and task.get("status") == "open"
+        pos = task.get("position") or 0.0
+        if pos > self._max_pos:
+            self._max_pos = pos
 
     def _remove_task(self, iid: str):
         self.cache.pop(iid, None)
+        self._rendered.pop(iid, None)
         try:
             self.tree.delete(iid)
         except tk.TclError:
             pass
+    def apply_event(self, action: str, record: dict):
+        """Patch puntual desde realtime: una fila, cero GETs."""
+        iid = self._iid_for(record)
+        if action == "delete" or record.get("status") != "open":
+            self._remove_task(iid)
+            return
+        self._upsert_task(record)  # también calcula record["_overdue"]
+        values = (record.get("title"), (record.get("due_date") or "")[:10],
+                  record.get("priority", 0))
+        tags = ("overdue",) if record.get("_overdue") else ()
+        sig = (values, tags)
+        if self.tree.exists(iid):
+            if self._rendered.get(iid) != sig:
+                self.tree.item(iid, values=values, tags=tags)
+        else:
+            self.tree.insert("", "end", iid=iid, values=values, tags=tags)
+        self._rendered[iid] = sig
+
+    def _fetch_items(self) -> list[dict]:
+        """Solo red, nada de Tk: puede correr en el executor."""
+        return self.client.list_tasks_all(self.context_id, status="open")
+
     def refresh_tasks(self) -> int:
-        """Pull open tasks and update tree. Returns number of items shown."""
+        """Variante síncrona (F5 manual): fetch + apply en el mismo hilo."""
         try:
-            items = self.client.list_tasks(self.context_id, status="open")
+            items = self._fetch_items()
         except Exception as e:
             print("Sync error:", e)
             return len(self.cache)
+        return self._apply_items(items)
+
+    def _apply_items(self, items: list[dict]) -> int:
+        """Guarda el snapshot y difiere el render a after_idle.
+
+        El diff no corre en medio del callback que trajo los datos: se
+        aplica cuando Tk queda libre, y si llegan varios snapshots antes
+        de eso solo se renderiza el último.
+        """
+        self._pending_items = items
+        if self._render_after is None:
+            self._render_after = self.after_idle(self._render_pending)
+        return len(items)
+
+    def _render_pending(self):
+        self._render_after = None
+        items, self._pending_items = self._pending_items, None
+        if items is None or not self.winfo_exists():
+            return
+        self._do_apply_items(items)
+
+    def _do_apply_items(self, items: list[dict]) -> int:
+        """Diff contra el tree: solo se tocan las filas que cambiaron.
 
+        Antes era delete-all + reinsert, que descarta y recrea N items de
+        Treeview (y pierde la selección) aunque no haya cambiado nada.
+        """
         by_id = {t["id"]: t for t in items}
+        removals = [iid for iid in self.cache if iid not in by_id]
+        additions = sum(1 for t in items if self._iid_for(t) not in self.cache)
 
-        # remove missing
-        to_remove = [iid for iid, t in self.cache.items() if t["id"] not in by_id]
-        for iid in to_remove:
-            self._remove_task(iid)
+        # diff grande (primer load, cambio de día): desmapear el tree
+        # mientras se aplica evita un redibujado por fila insertada; con
+        # pocos cambios no vale la pena el parpadeo del re-pack
+        hidden = (len(removals) + additions) > 50
+        if hidden:
+            self.tree.pack_forget()
+        try:
+            # bajas
+            for iid in removals:
+                self._remove_task(iid)
 
-        # upsert
-        for t in items:
-            self._upsert_task(t)
+            # altas / modificaciones (contra la tupla realmente renderizada).
+            # bindings locales: con cientos de filas el lookup de atributos
+            # y métodos pesa más que el trabajo real por iteración
+            today_iso = dt.date.today().isoformat()
+            tree = self.tree
+            exists, item, insert = tree.exists, tree.item, tree.insert
+            rendered = self._rendered
+            iid_for = self._iid_for
+            upsert = self._upsert_task
+            for i, t in enumerate(items):
+                iid = iid_for(t)
+                upsert(t, today_iso)  # también calcula t["_overdue"]
+                values = (t.get("title"), (t.get("due_date") or "")[:10],
+                          t.get("priority", 0))
+                tags = ("overdue",) if t.get("_overdue") else ()
+                sig = (values, tags)
+                if exists(iid):
+                    if rendered.get(iid) != sig:
+                        item(iid, values=values, tags=tags)
+                else:
+                    insert("", i, iid=iid, values=values, tags=tags)
+                rendered[iid] = sig
 
-        # rebuild view
-        self.tree.delete(*self.tree.get_children(""))
-        for t in items:
-            iid = self._iid_for(t)
-            self.tree.insert("", "end", iid=iid,
-                            values=(t.get("title"), t.get("priority", 0)))
+            # reorden: solo si el orden del server difiere del actual
+            desired = tuple(self._iid_for(t) for t in items)
+            if self.tree.get_children("") != desired:
+                for i, iid in enumerate(desired):
+                    self.tree.move(iid, "", i)
+        finally:
+            # exception-safe: el tree vuelve a mapearse pase lo que pase
+            if hidden:
+                self.tree.pack(fill="both", expand=True)
         return len(items)
 # ================== main ==================
 def main():
@@ -1,15 +1,95 @@
 import datetime as dt
-from typing import Dict
+from typing import Any, Dict, List
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# la sesión compartida por PocketBaseClient puede ser un httpx.Client
+# (transporte HTTP/2 opcional): mismo guard que storage.pocketbase
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+# orjson si está instalado (mismo guard opcional que storage.pocketbase):
+# los GET de prepare_today traen hasta 500 records cada uno
+try:
+    import orjson as _fastjson
+
+    def _loads(raw: bytes) -> Any:
+        return _fastjson.loads(raw)
+
+    def _dumps(obj: Any) -> bytes:
+        return _fastjson.dumps(obj)
+except ImportError:
+    import json as _stdjson
+
+    def _loads(raw: bytes) -> Any:
+        return _stdjson.loads(raw)
+
+    def _dumps(obj: Any) -> bytes:
+        return _stdjson.dumps(obj).encode()
 
 
 class DailyOps:
     """Operaciones del día: crear página diaria, mover pendientes, materializar rutinas, ajustar eventos."""
-    def __init__(self, base_url: str, user_token: str, user_id: str):
+    def __init__(self, base_url: str, user_token: str, user_id: str, session=None):
         self.base = base_url.rstrip('/')
-        self.s = requests.Session()
-        self.s.headers.update({"Authorization": f"Bearer {user_token}"})
+        if session is not None:
+            # pool compartido con PocketBaseClient: mismas conexiones
+            # keep-alive ya autenticadas, cero handshakes extra
+            self.s = session
+        else:
+            self.s = requests.Session()
+            # mismo pool keep-alive + retry que storage.pocketbase: prepare_today
+            # encadena varios GET seguidos y sin esto cada uno re-handshakea
+            adapter = HTTPAdapter(
+                pool_connections=4,
+                pool_maxsize=32,
+                max_retries=Retry(total=3, backoff_factor=0.2,
+                                  status_forcelist=[502, 503, 504],
+                                  allowed_methods=["GET", "POST", "PATCH", "DELETE"]),
+            )
+            self.s.mount("http://", adapter)
+            self.s.mount("https://", adapter)
+            # bodies pre-serializados con _dumps: el header va una sola vez
+            self.s.headers.update({"Authorization": f"Bearer {user_token}",
+                                   "Content-Type": "application/json"})
         self.user_id = user_id
+        # httpx no acepta bytes en data= (ruta de compatibilidad deprecada);
+        # el kwarg correcto depende del tipo de la sesión efectiva, no solo
+        # de que httpx esté instalado (la sesión propia siempre es requests)
+        self._body_kw = ("content" if httpx is not None and isinstance(self.s, httpx.Client)
+                         else "data")
+
+    # /api/batch rechaza lotes de más de 50 operaciones (límite por defecto
+    # de PocketBase) y es transaccional: un lote grande fallaba entero
+    _BATCH_MAX = 50
+
+    def _batch(self, ops: List[Dict]) -> List[Dict]:
+        """Envía las operaciones de escritura acumuladas a /api/batch en lotes de hasta 50."""
+        results: List[Dict] = []
+        for i in range(0, len(ops), self._BATCH_MAX):
+            chunk = ops[i:i + self._BATCH_MAX]
+            try:
+                r = self.s.post(f"{self.base}/api/batch", timeout=15,
+                                **{self._body_kw: _dumps({"requests": chunk})})
+                r.raise_for_status()
+            except Exception:
+                # batch deshabilitado o rechazando el lote: degradamos a
+                # escrituras individuales antes que perder el prepare_today
+                results.extend(self._singles(chunk))
+                continue
+            results.extend(res.get("body") for res in _loads(r.content))
+        return results
+
+    def _singles(self, ops: List[Dict]) -> List[Dict]:
+        out: List[Dict] = []
+        for op in ops:
+            r = self.s.request(op["method"], f"{self.base}{op['url']}", json=op.get("body"), timeout=10)
+            r.raise_for_status()
+            out.append(_loads(r.content) if r.content else {})
+        return out
 
     def _ensure_page(self, date_iso: str) -> Dict:
         start = f"{date_iso} 00:00:00Z"
@@ -18,18 +98,19 @@ class DailyOps:
         filt = f'owner = "{self.user_id}" && date >= "{start}" && date < "{end}"'
         r = self.s.get(f"{self.base}/api/collections/journal_pages/records", params={"filter": filt, "perPage": 1}, timeout=10)
         r.raise_for_status()
-        items = r.json().get("items", [])
+        items = _loads(r.content).get("items", [])
         if items:
             return items[0]
         # create normalized at 00:00Z; handle race by retrying fetch
         try:
-            r = self.s.post(f"{self.base}/api/collections/journal_pages/records", json={"date": start, "owner": self.user_id}, timeout=10)
+            r = self.s.post(f"{self.base}/api/collections/journal_pages/records", timeout=10,
+                            **{self._body_kw: _dumps({"date": start, "owner": self.user_id})})
             r.raise_for_status()
-            return r.json()
+            return _loads(r.content)
         except Exception:
             r = self.s.get(f"{self.base}/api/collections/journal_pages/records", params={"filter": filt, "perPage": 1}, timeout=10)
             r.raise_for_status()
-            items = r.json().get("items", [])
+            items = _loads(r.content).get("items", [])
             if items:
                 return items[0]
             raise
@@ -43,20 +124,36 @@ class DailyOps:
 
         self._ensure_page(today_iso)
 
+        # acumulamos todas las escrituras del día en un solo batch transaccional
+        ops: List[Dict] = []
+
         # mover tareas 'open' de ayer a hoy (solo kind=todo)
         rf = f'owner = "{self.user_id}" && status = "open" && journal_date = "{y_iso}" && kind = "todo"'
-        r = self.s.get(f"{self.base}/api/collections/tasks/records", params={"filter": rf, "perPage": 500}, timeout=15)
+        r = self.s.get(f"{self.base}/api/collections/tasks/records", params={"filter": rf, "perPage": 500, "fields": "id,migrated_count", "skipTotal": "true"}, timeout=15)
         r.raise_for_status()
-        for t in r.json().get("items", []):
+        for t in _loads(r.content).get("items", []):
             migrated = (t.get("migrated_count") or 0) + 1
-            self.s.patch(f"{self.base}/api/collections/tasks/records/{t['id']}", json={"journal_date": today_iso, "migrated_count": migrated}, timeout=10).raise_for_status()
+            ops.append({
+                "method": "PATCH",
+                "url": f"/api/collections/tasks/records/{t['id']}",
+                "body": {"journal_date": today_iso, "migrated_count": migrated},
+            })
 
         # materializar rutinas semanales (FREQ=WEEKLY;BYDAY=...)
         weekday_map = ["MO", "TU", "WE", "TH", "FR", "SA", "SU"]
         today_token = weekday_map[today.weekday()]
-        r = self.s.get(f"{self.base}/api/collections/tasks/records", params={"filter": f'owner = "{self.user_id}" && kind = "routine" && recurrence != ""', "perPage": 500}, timeout=15)
+        r = self.s.get(f"{self.base}/api/collections/tasks/records", params={"filter": f'owner = "{self.user_id}" && kind = "routine" && recurrence != ""', "perPage": 500, "fields": "id,title,notes,priority,context,recurrence", "skipTotal": "true"}, timeout=15)
         r.raise_for_status()
-        for rt in r.json().get("items", []):
+        routines = _loads(r.content).get("items", [])
+        # instancias ya materializadas hoy, en UN solo GET: el chequeo de
+        # duplicados por rutina pasa a ser un lookup en memoria
+        chk = self.s.get(f"{self.base}/api/collections/tasks/records",
+                         params={"filter": f'owner = "{self.user_id}" && journal_date = "{today_iso}" && parent_task != ""',
+                                 "perPage": 500, "fields": "parent_task", "skipTotal": "true"},
+                         timeout=15)
+        chk.raise_for_status()
+        materialized = {c.get("parent_task") for c in _loads(chk.content).get("items", [])}
+        for rt in routines:
             rrule = (rt.get("recurrence") or "").upper()
             if "FREQ=WEEKLY" not in rrule:
                 continue
@@ -66,10 +163,8 @@ class DailyOps:
                     byday = [p.strip() for p in part.replace("BYDAY=", "").split(",") if p.strip()]
             if byday and today_token not in byday:
                 continue
-            # evitar duplicado
-            chk = self.s.get(f"{self.base}/api/collections/tasks/records", params={"filter": f'owner = "{self.user_id}" && parent_task = "{rt["id"]}" && journal_date = "{today_iso}"', "perPage": 1}, timeout=10)
-            chk.raise_for_status()
-            if chk.json().get("items"):
+            # evitar duplicado (contra el set prefetcheado)
+            if rt["id"] in materialized:
                 continue
             payload = {
                 "title": rt.get("title"),
@@ -83,13 +178,20 @@ class DailyOps:
                 "journal_date": today_iso,
                 "parent_task": rt.get("id")
             }
-            self.s.post(f"{self.base}/api/collections/tasks/records", json=payload, timeout=10).raise_for_status()
+            ops.append({"method": "POST", "url": "/api/collections/tasks/records", "body": payload})
 
         # eventos del día → asegurar que aparezcan en la página de hoy
         evf = (f'owner = "{self.user_id}" && kind = "event" '
                f'&& start_at >= "{today_iso} 00:00:00Z" && start_at < "{today_iso} 23:59:59Z"')
-        r = self.s.get(f"{self.base}/api/collections/tasks/records", params={"filter": evf, "perPage": 500}, timeout=15)
+        r = self.s.get(f"{self.base}/api/collections/tasks/records", params={"filter": evf, "perPage": 500, "fields": "id,journal_date", "skipTotal": "true"}, timeout=15)
         r.raise_for_status()
-        for ev in r.json().get("items", []):
+        for ev in _loads(r.content).get("items", []):
             if ev.get("journal_date") != today_iso:
-                self.s.patch(f"{self.base}/api/collections/tasks/records/{ev['id']}", json={"journal_date": today_iso}, timeout=10).raise_for_status()
\ No newline at end of file
+                ops.append({
+                    "method": "PATCH",
+                    "url": f"/api/collections/tasks/records/{ev['id']}",
+                    "body": {"journal_date": today_iso},
+                })
+
+        # una sola ida y vuelta para todos los PATCH/POST del día
+        self._batch(ops)
\ No newline at end of file
@@ -1,69 +1,399 @@
 from __future__ import annotations
+import base64
+import os
+import random
+import threading
+import time
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from typing import List, Dict, Any, Optional
 from core.exceptions import PBError
 
+# orjson si está instalado (3-5x más rápido parseando las listas del sync);
+# si no, stdlib json — mismo guard que usamos para websocket-client
+try:
+    import orjson as _fastjson
+
+    def _loads(raw: bytes) -> Any:
+        return _fastjson.loads(raw)
+
+    def _dumps(obj: Any) -> bytes:
+        return _fastjson.dumps(obj)
+except ImportError:
+    import json as _stdjson
+
+    def _loads(raw: bytes) -> Any:
+        return _stdjson.loads(raw)
+
+    def _dumps(obj: Any) -> bytes:
+        return _stdjson.dumps(obj).encode()
+
+# httpx si está instalado: HTTP/2 multiplexa contexts+tasks+batch sobre una
+# sola conexión TCP+TLS (si el server/proxy habla h2); si no, requests con
+# pool keep-alive — mismo guard opcional que pb_bootstrap
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+# requests manda bytes con data=, httpx con content=
+_BODY_KW = "data" if httpx is None else "content"
+
+
+def _ok(r) -> bool:
+    # requests tiene .ok, httpx no: chequeo de status portable entre ambos
+    return 200 <= r.status_code < 300
+
+
+# token persistido entre corridas: los JWT de PocketBase valen horas, no
+# tiene sentido pagar el login (bcrypt del lado del server) en cada arranque
+_AUTH_CACHE = os.path.join(os.path.expanduser("~"), ".config", "dsntodo", "auth.json")
+
+
+def _jwt_exp(token: str) -> float:
+    """exp (epoch) del payload del JWT; 0.0 si no se puede decodificar."""
+    try:
+        payload_b64 = token.split(".")[1]
+        payload_b64 += "=" * (-len(payload_b64) % 4)
+        return float(_loads(base64.urlsafe_b64decode(payload_b64)).get("exp") or 0)
+    except Exception:
+        return 0.0
+
+
+# proyección para las listas de tasks: la UI solo renderiza estos campos;
+# dejar notes y las fechas de evento afuera achica bastante el payload con
+# perPage=500
+_TASK_FIELDS = "id,title,status,kind,priority,position,context,due_date,journal_date,recurrence,parent_task,updated"
+
 
 class PocketBaseClient:
     def __init__(self, base_url: str):
         self.base_url = base_url.rstrip("/")
-        self.session = requests.Session()
+        # una sola sesión con pool de conexiones keep-alive: evita un handshake
+        # TCP+TLS por request en el loop de auto-sync. Con httpx disponible,
+        # HTTP/2 multiplexa todo sobre una única conexión.
+        if httpx is not None:
+            try:
+                self.session = httpx.Client(
+                    http2=True, timeout=10,
+                    limits=httpx.Limits(max_connections=8, max_keepalive_connections=8))
+            except ImportError:  # httpx sin el extra h2
+                self.session = httpx.Client(timeout=10)
+        else:
+            self.session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=4,
+                pool_maxsize=32,
+                max_retries=Retry(total=2, backoff_factor=0.2),
+            )
+            self.session.mount("http://", adapter)
+            self.session.mount("https://", adapter)
+        # mandamos los bodies ya serializados (data=), el header va una sola vez
+        self.session.headers["Content-Type"] = "application/json"
         self.token: Optional[str] = ""
         self.user_id: Optional[str] = ""
+        # prefijo de filtro precalculado tras el login: todos los queries
+        # lo repiten, no hace falta re-armar el f-string en cada request
+        self._owner_filter = 'owner = ""'
+        # cache de lecturas: key -> (etag, payload, fetched_at). Dentro del TTL
+        # se devuelve directo; vencido el TTL se revalida con If-None-Match y
+        # un 304 evita transferir/parsear el body de nuevo.
+        self._cache: Dict[Any, tuple] = {}
+        # TTL por endpoint: las tasks cambian seguido (apenas amortigua ráfagas
+        # de refresh); los contextos casi nunca, así que viven 10 minutos
+        self._cache_ttl = 5.0
+        self._cache_ttl_contexts = 600.0
+        self._rt_stop = threading.Event()
+
+    def close(self):
+        self.close_realtime()
+        self.session.close()
+
+    # ---------- realtime (SSE) ----------
+    def subscribe(self, subscriptions: List[str], on_event, on_status=None) -> threading.Thread:
+        """Abre el stream SSE de /api/realtime en un hilo daemon.
+
+        on_event(action, record) y on_status(conectado: bool) se llaman DESDE
+        el hilo del stream: el caller debe cruzarlos al hilo de Tk (after).
+        El loop reintenta con backoff exponencial y se corta con close_realtime().
+        """
+        self._rt_stop.clear()
+
+        def _notify(ok: bool):
+            if on_status is not None:
+                try:
+                    on_status(ok)
+                except Exception:
+                    pass
+
+        def _handle_frame(event: Optional[str], data: str):
+            if not data:
+                return
+            try:
+                payload = _loads(data.encode())
+            except Exception:
+                return
+            if event == "PB_CONNECT" or (isinstance(payload, dict) and "clientId" in payload):
+                # handshake: registramos las suscripciones para este clientId
+                body = {"clientId": payload.get("clientId"), "subscriptions": subscriptions}
+                r = self.session.post(f"{self.base_url}/api/realtime", timeout=10,
+                                      **{_BODY_KW: _dumps(body)})
+                if not _ok(r):
+                    raise PBError(f"Realtime subscribe failed: {r.status_code} {r.text}")
+                _notify(True)
+                return
+            if isinstance(payload, dict) and "action" in payload:
+                on_event(payload.get("action"), payload.get("record") or {})
+
+        def _open_stream(url: str):
+            # read-timeout None: el stream queda abierto indefinidamente.
+            # httpx y requests exponen el streaming con APIs distintas.
+            if httpx is not None:
+                return self.session.stream("GET", url,
+                                           timeout=httpx.Timeout(5.0, read=None))
+            return self.session.get(url, stream=True, timeout=(5, None))
+
+        def _run():
+            backoff = 1.0
+            while not self._rt_stop.is_set():
+                try:
+                    with _open_stream(f"{self.base_url}/api/realtime") as r:
+                        if not _ok(r):
+                            # .text no está disponible en streams httpx sin read()
+                            raise PBError(f"Realtime stream HTTP {r.status_code}")
+                        event, data_lines = None, []
+                        for raw in r.iter_lines():
+                            if self._rt_stop.is_set():
+                                return
+                            line = raw.decode("utf-8", "replace") if isinstance(raw, bytes) else raw
+                            if line == "":
+                                _handle_frame(event, "\n".join(data_lines))
+                                backoff = 1.0
+                                event, data_lines = None, []
+                            elif line.startswith("event:"):
+                                event = line[6:].strip()
+                            elif line.startswith("data:"):
+                                data_lines.append(line[5:].strip())
+                except Exception:
+                    pass
+                # el server cortó (o falló el connect): avisamos y reintentamos
+                _notify(False)
+                if self._rt_stop.wait(backoff + random.uniform(0, backoff / 2)):
+                    return
+                backoff = min(backoff * 2, 30.0)
+
+        t = threading.Thread(target=_run, name="pb-realtime", daemon=True)
+        t.start()
+        return t
+
+    def close_realtime(self):
+        self._rt_stop.set()
+
+    # ---------- cache ----------
+    def _cached_get(self, url: str, params: Dict[str, Any], key: Any,
+                    ttl: Optional[float] = None) -> Dict[str, Any]:
+        if ttl is None:
+            ttl = self._cache_ttl
+        now = time.monotonic()
+        entry = self._cache.get(key)
+        headers = {}
+        if entry:
+            etag, payload, fetched_at = entry
+            if now - fetched_at < ttl:
+                return payload
+            if etag:
+                headers["If-None-Match"] = etag
+        r = self.session.get(url, params=params, headers=headers, timeout=10)
+        if r.status_code == 304 and entry:
+            self._cache[key] = (entry[0], entry[1], now)
+            return entry[1]
+        if not _ok(r):
+            raise PBError(r.text)
+        payload = _loads(r.content)
+        self._cache[key] = (r.headers.get("ETag"), payload, now)
+        return payload
+
+    def _invalidate(self, context_id: Optional[str] = None):
+        """Descarta entradas de cache afectadas por una mutación."""
+        if context_id is None:
+            self._cache.clear()
+            return
+        for k in [k for k in self._cache
+                  if k[0] == "tasks" and k[1] in (context_id, None, "all")]:
+            self._cache.pop(k, None)
 
     # ---------- auth ----------
     def login(self, identity: str, password: str) -> bool:
         url = f"{self.base_url}/api/collections/users/auth-with-password"
-        r = self.session.post(url, json={"identity": identity, "password": password}, timeout=10)
-        if not r.ok:
+        r = self.session.post(url, timeout=10,
+                              **{_BODY_KW: _dumps({"identity": identity, "password": password})})
+        if not _ok(r):
             raise PBError(f"Login failed: {r.status_code} {r.text}")
-        data = r.json()
+        data = _loads(r.content)
         self.token = data.get("token")
         self.user_id = data.get("record", {}).get("id")
         if not self.token or not self.user_id:
             raise PBError("Missing token or user id in login response")
         self.session.headers.update({"Authorization": f"Bearer {self.token}"})
+        self._owner_filter = f'owner = "{self.user_id}"'
+        self._save_auth()
+        return True
+
+    def login_cached(self, identity: str, password: str) -> bool:
+        """Login evitando el round-trip si hay un token persistido vigente.
+
+        Usa ~/.config/dsntodo/auth.json; si el token vence en menos de una
+        hora lo renueva con auth-refresh, y ante cualquier problema cae al
+        login con password de siempre.
+        """
+        try:
+            with open(_AUTH_CACHE, "rb") as f:
+                auth = _loads(f.read())
+        except (OSError, ValueError):
+            auth = None
+        now = time.time()
+        if auth and auth.get("token") and auth.get("user_id") and (auth.get("exp") or 0) > now + 60:
+            self.token = auth["token"]
+            self.user_id = auth["user_id"]
+            self.session.headers.update({"Authorization": f"Bearer {self.token}"})
+            self._owner_filter = f'owner = "{self.user_id}"'
+            if (auth.get("exp") or 0) - now >= 3600:
+                return True
+            # por vencer: renovarlo; si el server lo rechaza, password login
+            try:
+                return self._auth_refresh()
+            except PBError:
+                pass
+        return self.login(identity, password)
+
+    def _auth_refresh(self) -> bool:
+        r = self.session.post(f"{self.base_url}/api/collections/users/auth-refresh", timeout=10)
+        if not _ok(r):
+            raise PBError(f"Auth refresh failed: {r.status_code} {r.text}")
+        data = _loads(r.content)
+        self.token = data.get("token") or self.token
+        self.session.headers.update({"Authorization": f"Bearer {self.token}"})
+        self._save_auth()
         return True
 
+    def _save_auth(self):
+        """Persiste token/user_id con modo 0600; best-effort, nunca rompe el login."""
+        try:
+            os.makedirs(os.path.dirname(_AUTH_CACHE), exist_ok=True)
+            payload = _dumps({"token": self.token, "user_id": self.user_id,
+                              "exp": _jwt_exp(self.token)})
+            fd = os.open(_AUTH_CACHE, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "wb") as f:
+                f.write(payload)
+        except OSError:
+            pass
+
     # ---------- contexts ----------
     def list_contexts(self) -> List[Dict[str, Any]]:
         url = f"{self.base_url}/api/collections/contexts/records"
-        r = self.session.get(url, params={"filter": f'owner = "{self.user_id}"', "perPage": 200}, timeout=10)
-        if not r.ok:
-            raise PBError(r.text)
-        return r.json().get("items", [])
+        params = {"filter": self._owner_filter, "perPage": 200,
+                  "fields": "id,name,color", "skipTotal": "true"}
+        return self._cached_get(url, params, ("contexts",),
+                                ttl=self._cache_ttl_contexts).get("items", [])
 
     def ensure_context(self, name: str, color: Optional[str] = None) -> Dict[str, Any]:
         # get by name for owner
         url = f"{self.base_url}/api/collections/contexts/records"
-        r = self.session.get(url, params={"filter": f'name = "{name}" && owner = "{self.user_id}"', "perPage": 1}, timeout=10)
-        if r.ok and r.json().get("items"):
-            return r.json()["items"][0]
+        r = self.session.get(url, params={"filter": f'name = "{name}" && {self._owner_filter}', "perPage": 1}, timeout=10)
+        if _ok(r):
+            items = _loads(r.content).get("items")
+            if items:
+                return items[0]
         # create
         payload = {"name": name, "owner": self.user_id}
         if color:
             payload["color"] = color
-        r = self.session.post(f"{self.base_url}/api/collections/contexts/records", json=payload, timeout=10)
-        if not r.ok:
+        r = self.session.post(f"{self.base_url}/api/collections/contexts/records", timeout=10,
+                              **{_BODY_KW: _dumps(payload)})
+        if not _ok(r):
             raise PBError(r.text)
-        return r.json()
+        self._cache.pop(("contexts",), None)
+        return _loads(r.content)
+
+    # ---------- batch ----------
+    def batch(self, ops: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Envía varias operaciones en un solo request transaccional (/api/batch).
+
+        Cada op tiene la forma {"method": "POST", "url": "/api/collections/.../records", "body": {...}}.
+        Devuelve los bodies parseados en el mismo orden.
+        """
+        if not ops:
+            return []
+        r = self.session.post(f"{self.base_url}/api/batch", timeout=15,
+                              **{_BODY_KW: _dumps({"requests": ops})})
+        if not _ok(r):
+            raise PBError(f"Batch failed: {r.status_code} {r.text}")
+        self._invalidate()
+        return [res.get("body") for res in _loads(r.content)]
 
     # ---------- tasks ----------
-    def list_tasks(self, context_id: str, status: str = "all") -> List[Dict[str, Any]]:
+    def list_tasks(self, context_id: str, status: str = "all",
+                   cache_key: Optional[Any] = None) -> List[Dict[str, Any]]:
         url = f"{self.base_url}/api/collections/tasks/records"
-        filt = f'owner = "{self.user_id}" && context = "{context_id}"' if context_id and context_id != 'all' else f'owner = "{self.user_id}"'
+        filt = f'{self._owner_filter} && context = "{context_id}"' if context_id and context_id != 'all' else self._owner_filter
         if status:
             if status == "all":
                 filt += f' && status = "open" || status = "done" || status = "cancelled"'
             else:
                 filt += f' && status = "{status}"'
-        r = self.session.get(url, params={"filter": filt, "sort": "position,-priority,created", "perPage": 500}, timeout=10)
-        if not r.ok:
+        params = {"filter": filt, "sort": "position,-priority,created", "perPage": 500,
+                  "fields": _TASK_FIELDS, "skipTotal": "true"}
+        key = cache_key if cache_key is not None else ("tasks", context_id, status)
+        return self._cached_get(url, params, key).get("items", [])
+
+    def list_tasks_multi(self, context_ids: List[str],
+                         status: str = "open") -> List[Dict[str, Any]]:
+        """Tareas de varios contextos en un solo GET (filtro OR).
+
+        El sort arranca por `context` así los items llegan ya agrupados y el
+        caller los reparte por tab con una sola pasada. La key de cache usa
+        None como context para que _invalidate(context_id) también la barra.
+        """
+        if not context_ids:
+            return []
+        url = f"{self.base_url}/api/collections/tasks/records"
+        ors = " || ".join(f'context = "{cid}"' for cid in context_ids)
+        filt = f'{self._owner_filter} && ({ors})'
+        if status:
+            if status == "all":
+                filt += ' && (status = "open" || status = "done" || status = "cancelled")'
+            else:
+                filt += f' && status = "{status}"'
+        params = {"filter": filt, "sort": "context,position,-priority,created", "perPage": 500,
+                  "fields": _TASK_FIELDS, "skipTotal": "true"}
+        key = ("tasks", None, tuple(context_ids), status)
+        return self._cached_get(url, params, key).get("items", [])
+
+    def top_position(self, context_id: Optional[str] = None,
+                     parent_task: Optional[str] = None) -> float:
+        """Máxima `position` actual (0.0 si no hay tareas).
+
+        Pide un solo registro con un solo campo en vez de la lista completa:
+        sort=-position & perPage=1.
+        """
+        url = f"{self.base_url}/api/collections/tasks/records"
+        filt = self._owner_filter
+        if context_id and context_id != "all":
+            filt += f' && context = "{context_id}"'
+        if parent_task:
+            filt += f' && parent_task = "{parent_task}"'
+        params = {"filter": filt, "sort": "-position", "perPage": 1,
+                  "fields": "position", "skipTotal": "true"}
+        r = self.session.get(url, params=params, timeout=10)
+        if not _ok(r):
             raise PBError(r.text)
-        return r.json().get("items", [])
+        items = _loads(r.content).get("items", [])
+        return (items[0].get("position") or 0.0) if items else 0.0
 
     def create_task(self, *, title: str, context_id: str, position: float = 1.0, priority: int = 0,
-                    kind: str = "todo", journal_date: Optional[str] = None) -> Dict[str, Any]:
+                    kind: str = "todo", journal_date: Optional[str] = None,
+                    parent_task: Optional[str] = None) -> Dict[str, Any]:
         import datetime as dt
         if journal_date is None:
             journal_date = dt.date.today().isoformat()
@@ -77,14 +407,22 @@ class PocketBaseClient:
             "owner": self.user_id,
             "journal_date": journal_date,
         }
-        r = self.session.post(f"{self.base_url}/api/collections/tasks/records", json=payload, timeout=10)
-        if not r.ok:
+        if parent_task:
+            payload["parent_task"] = parent_task
+        r = self.session.post(f"{self.base_url}/api/collections/tasks/records", timeout=10,
+                              **{_BODY_KW: _dumps(payload)})
+        if not _ok(r):
             raise PBError(f"Create task failed: {r.status_code} {r.text}")
-        return r.json()
+        self._invalidate(context_id)
+        return _loads(r.content)
 
     def patch_task(self, task_id: str, **fields) -> Dict[str, Any]:
         url = f"{self.base_url}/api/collections/tasks/records/{task_id}"
-        r = self.session.patch(url, json=fields, timeout=10)
-        if not r.ok:
+        r = self.session.patch(url, timeout=10, **{_BODY_KW: _dumps(fields)})
+        if not _ok(r):
             raise PBError(r.text)
-        return r.json()
\ No newline at end of file
+        data = _loads(r.content)
+        # la respuesta trae el record: invalidamos solo el context afectado
+        # en vez de barrer todo el cache de tasks
+        self._invalidate(data.get("context"))
+        return data
\ No newline at end of file